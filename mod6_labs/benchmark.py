@@ -0,0 +1,189 @@
+# benchmark.py
+"""Offline load test for WeatherService against the fake API.
+
+Starts fake_server.FakeOpenWeather in-process on a free port, points
+WeatherService at it and measures throughput and latency percentiles for
+single, concurrent and bulk lookups. Caching and client-side rate limits
+are disabled, so every lookup goes through the full request path
+(geocoding + weather call).
+
+Usage:
+    python benchmark.py
+    python benchmark.py --requests 500 --concurrency 50 --latency 0.02
+    python benchmark.py --error-rate 0.05 --throttle-rate 0.01 --json
+    python benchmark.py --metrics prometheus   # also dump service metrics
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from fake_server import FakeOpenWeather
+from local_http import server_url, start_server
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float], errors: int,
+              elapsed: float) -> Dict[str, float]:
+    count = len(latencies)
+    return {
+        "scenario": name,
+        "requests": count,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def timed(fetch: Callable[[], Awaitable], latencies: List[float]) -> bool:
+    """Run one lookup, record its latency and return whether it succeeded."""
+    from weather_service import WeatherServiceError
+
+    started = time.perf_counter()
+    try:
+        await fetch()
+        ok = True
+    except WeatherServiceError:
+        ok = False
+    latencies.append(time.perf_counter() - started)
+    return ok
+
+
+async def bench_single(service, cities: List[str]) -> Dict[str, float]:
+    """One lookup at a time."""
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    for city in cities:
+        if not await timed(lambda: service.get_weather(city), latencies):
+            errors += 1
+    return summarize("single", latencies, errors, time.perf_counter() - started)
+
+
+async def bench_concurrent(service, cities: List[str],
+                           concurrency: int) -> Dict[str, float]:
+    """Many independent lookups, at most ``concurrency`` in flight."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(city: str) -> bool:
+        async with semaphore:
+            return await timed(lambda: service.get_weather(city), latencies)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(city) for city in cities))
+    elapsed = time.perf_counter() - started
+    return summarize("concurrent", latencies, results.count(False), elapsed)
+
+
+async def bench_bulk(service, cities: List[str],
+                     concurrency: int) -> Dict[str, float]:
+    """The bulk API (get_weather_many)."""
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    async for result in service.get_weather_many(cities, concurrency=concurrency):
+        latencies.append(result.elapsed)
+        if not result.ok:
+            errors += 1
+    return summarize("bulk", latencies, errors, time.perf_counter() - started)
+
+
+async def run(args) -> List[Dict[str, float]]:
+    fake = FakeOpenWeather(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=0,
+        seed=args.seed,
+    )
+    server = await start_server(fake)
+
+    # Configure before WeatherService reads its settings
+    os.environ.update({
+        "OPENWEATHER_BASE_URL": f"{server_url(server)}/data/2.5/weather",
+        "OPENWEATHER_API_KEY": "bench",
+        "WEATHER_CACHE_ENABLED": "false",
+        "WEATHER_CACHE_DB": "",
+        "OPENWEATHER_CALLS_PER_MINUTE": "0",
+        "OPENWEATHER_CALLS_PER_DAY": "0",
+        "WEATHER_MAX_CONNECTIONS": str(max(args.concurrency, 1)),
+        "WEATHER_MAX_KEEPALIVE_CONNECTIONS": str(max(args.concurrency, 1)),
+        "WEATHER_METRICS_ENABLED": "true" if args.metrics else "false",
+    })
+    from config import Config
+    from weather_service import WeatherService
+
+    Config.reload()
+
+    # Distinct names so concurrent lookups are not coalesced
+    cities = [f"Bench City {i}" for i in range(args.requests)]
+    results = []
+    try:
+        async with WeatherService() as service:
+            # Warm up the connection pool and lazy imports
+            await service.get_weather("Warmup")
+
+            results.append(await bench_single(service, cities[:args.single]))
+            results.append(await bench_concurrent(service, cities, args.concurrency))
+            results.append(await bench_bulk(service, cities, args.concurrency))
+
+            if args.metrics == "json":
+                print(service.metrics.to_json(), file=sys.stderr)
+            elif args.metrics == "prometheus":
+                print(service.metrics.to_prometheus(), file=sys.stderr)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark WeatherService offline")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="lookups in the concurrent and bulk scenarios")
+    parser.add_argument("--single", type=int, default=50,
+                        help="lookups in the sequential scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=106)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    parser.add_argument("--metrics", choices=("json", "prometheus"),
+                        help="record service metrics and dump them to stderr")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{'scenario':<12}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['scenario']:<12}{r['requests']:>10}{r['errors']:>8}"
+              f"{r['throughput']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# cache.py
+"""In-memory TTL + LRU cache for weather responses."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Lookup states returned by TTLCache.lookup()
+FRESH = "fresh"
+STALE = "stale"
+
+
+class CacheEntry:
+    """A cached value with its freshness deadlines."""
+
+    __slots__ = ("value", "stored_at", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float,
+                 stale_until: float):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    """
+    Bounded cache with per-entry TTLs and least-recently-used eviction.
+
+    Entries are fresh until their TTL runs out. After that they stay
+    servable as *stale* for ``stale_ttl`` more seconds so callers can
+    return them immediately while refreshing in the background.
+    """
+
+    def __init__(self, max_entries: int = 128, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+        # Counters for tuning TTLs
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def lookup(self, key: Hashable) -> Tuple[Any, Optional[str]]:
+        """
+        Look up a key and report how fresh it is.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, state) where state is FRESH, STALE or None
+            on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+
+        now = time.monotonic()
+        if now < entry.expires_at:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value, FRESH
+
+        if now < entry.stale_until:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry.value, STALE
+
+        # Too old to serve at all
+        del self._entries[key]
+        self.misses += 1
+        return None, None
+
+    def get(self, key: Hashable) -> Any:
+        """Return the fresh value for a key, or None."""
+        value, state = self.lookup(key)
+        return value if state == FRESH else None
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds the value stays fresh
+        """
+        now = time.monotonic()
+        expires_at = now + ttl
+        self._entries[key] = CacheEntry(
+            value, now, expires_at, expires_at + self.stale_ttl
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until a key stops being fresh (negative if stale)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry.expires_at - time.monotonic()
+
+    def invalidate(self, key: Hashable):
+        """Remove a single key."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_ratio": (
+                (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            ),
+        }
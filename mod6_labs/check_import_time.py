@@ -0,0 +1,87 @@
+# check_import_time.py
+"""Measure import time of the weather app modules against a budget.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter,
+prints the slowest imports and fails if the module's cumulative import
+time exceeds the budget, or if a module that should load lazily (httpx,
+numpy, sqlite3, dotenv) was imported.
+
+Usage:
+    python check_import_time.py                      # weather_service, 150 ms
+    python check_import_time.py --module main --budget 1500 --allow httpx
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Modules that must not be loaded just by importing the app modules
+DEFERRED_MODULES = ("httpx", "numpy", "sqlite3", "dotenv")
+
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """
+    Import a module in a fresh interpreter and collect -X importtime data.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        List of (module name, self µs, cumulative µs)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (
+            part.strip() for part in line.replace("import time:", "|").split("|")
+        )
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="weather_service")
+    parser.add_argument("--budget", type=float, default=150.0, help="milliseconds")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--allow", action="append", default=[],
+        help="deferred module allowed to load (e.g. when a dependency imports it)",
+    )
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cum for name, _, cum in rows if name == args.module) / 1000
+
+    print(f"Slowest imports under '{args.module}' (cumulative):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    loaded = {name for name, _, _ in rows}
+    eager = [m for m in DEFERRED_MODULES if m in loaded and m not in args.allow]
+
+    print(f"\nTotal: {total_ms:.1f} ms (budget {args.budget:.0f} ms)")
+    failed = False
+    if total_ms > args.budget:
+        print("FAIL: import time over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
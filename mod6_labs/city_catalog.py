@@ -0,0 +1,352 @@
+# city_catalog.py
+"""Offline city catalogue for instant autocomplete.
+
+The catalogue is two sorted text files that are memory-mapped and
+binary-searched in place, so lookups need no network, no parsing at
+startup and little resident memory:
+
+``cities.tsv``
+    One city per line: ``key, name, country, admin, population``
+    (tab-separated), sorted by the normalized ``key`` and then by
+    population, largest first.
+
+``cities.idx``
+    Sorted lookup lines pointing at byte offsets in ``cities.tsv``:
+    ``T<prefix>`` lists the most populous cities for every 1-3
+    character prefix, and ``D<n><variant>`` maps each one-character
+    deletion of a city's first n (4 or 5) characters to the city, so
+    queries with a typo can be matched (a symmetric-delete index).
+
+Build them from a GeoNames dump (e.g. cities15000.txt) or a simple
+``name, country, admin, population`` TSV:
+
+    python city_catalog.py build cities15000.txt data/
+"""
+
+import argparse
+import mmap
+import os
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv")
+
+TOP_PREFIX_LENGTH = 3  # prefixes up to this length have precomputed top lists
+TOP_PER_PREFIX = 10
+FUZZY_PREFIX_LENGTHS = (4, 5)  # key prefix lengths in the deletion index
+MAX_PREFIX_SCAN = 400  # rows read for one prefix query
+MAX_FUZZY_CANDIDATES = 200
+
+
+@dataclass(frozen=True)
+class City:
+    """A catalogue entry."""
+
+    __slots__ = ("name", "country", "admin", "population")
+
+    name: str
+    country: str  # ISO 3166 country code
+    admin: str  # state, province or region (may be empty)
+    population: int
+
+    @property
+    def query(self) -> str:
+        """Search text for the weather service, e.g. 'Naga, PH'."""
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+    @property
+    def display_name(self) -> str:
+        """Label for suggestion lists, e.g. 'Naga, Camarines Sur, PH'."""
+        return ", ".join(part for part in (self.name, self.admin, self.country) if part)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    chars = [
+        ch.lower() if ch.isalnum() else " "
+        for ch in decomposed
+        if not unicodedata.combining(ch)
+    ]
+    return " ".join("".join(chars).split())
+
+
+def _deletions(text: str) -> Iterator[str]:
+    """The text itself and every variant with one character removed."""
+    yield text
+    for i in range(len(text)):
+        yield text[:i] + text[i + 1:]
+
+
+def edit_distances(a: str, b: str) -> List[int]:
+    """
+    Optimal string alignment distances (Levenshtein plus transpositions)
+    from ``a`` to every prefix of ``b``.
+
+    Returns:
+        List where item j is the distance between a and b[:j]
+    """
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            cost = 0 if ca == cb else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous
+
+
+def _lower_bound(data: mmap.mmap, key: bytes) -> int:
+    """Offset of the first line whose first field is >= key."""
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        newline = data.rfind(b"\n", lo, mid)
+        start = lo if newline < 0 else newline + 1
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = len(data)
+        tab = data.find(b"\t", start, end)
+        if data[start:end if tab < 0 else tab] < key:
+            lo = end + 1
+        else:
+            hi = start
+    return lo
+
+
+def _lines_from(data: mmap.mmap, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) pairs starting at a line boundary."""
+    size = len(data)
+    while offset < size:
+        end = data.find(b"\n", offset)
+        if end < 0:
+            end = size
+        yield offset, data[offset:end]
+        offset = end + 1
+
+
+class CityCatalog:
+    """
+    Prefix and typo-tolerant search over the bundled city catalogue.
+
+    Args:
+        path: Path to cities.tsv; the index is the sibling .idx file
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._cities = self._map(path)
+        self._index = self._map(os.path.splitext(path)[0] + ".idx")
+
+    @staticmethod
+    def _map(path: str) -> Optional[mmap.mmap]:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for data in (self._cities, self._index):
+            if data is not None:
+                data.close()
+        self._cities = self._index = None
+
+    def _row(self, offset: int) -> Tuple[str, City]:
+        end = self._cities.find(b"\n", offset)
+        fields = self._cities[offset:end if end >= 0 else None].decode("utf-8").split("\t")
+        key, name, country, admin, population = fields
+        return key, City(name, country, admin, int(population or 0))
+
+    def _index_values(self, key: str) -> Iterator[bytes]:
+        """Values of the index lines whose key equals ``key``."""
+        target = key.encode("utf-8")
+        prefix = target + b"\t"
+        for _, line in _lines_from(self._index, _lower_bound(self._index, target)):
+            if not line.startswith(prefix):
+                return
+            yield line[len(prefix):]
+
+    def _prefix_matches(self, query: str) -> List[Tuple[int, str, City]]:
+        """Cities whose key starts with the query, as (offset, key, city)."""
+        if len(query) <= TOP_PREFIX_LENGTH:
+            offsets = [
+                int(offset)
+                for value in self._index_values("T" + query)
+                for offset in value.split(b",")
+            ]
+            return [(offset, *self._row(offset)) for offset in offsets]
+
+        target = query.encode("utf-8")
+        matches = []
+        for offset, line in _lines_from(self._cities, _lower_bound(self._cities, target)):
+            if not line.startswith(target) or len(matches) >= MAX_PREFIX_SCAN:
+                break
+            matches.append((offset, *self._row(offset)))
+        return matches
+
+    def _fuzzy_matches(self, query: str, exclude: set) -> List[Tuple[int, int, City]]:
+        """
+        Cities within one or two edits of the query.
+
+        Returns:
+            List of (prefix distance, whole-name distance, city)
+        """
+        n = min(len(query), max(FUZZY_PREFIX_LENGTHS))
+        head = query[:n]
+
+        offsets = []
+        for variant in set(_deletions(head)):
+            for value in self._index_values(f"D{n}{variant}"):
+                offset = int(value)
+                if offset not in exclude:
+                    exclude.add(offset)
+                    offsets.append(offset)
+            if len(offsets) >= MAX_FUZZY_CANDIDATES:
+                break
+
+        max_distance = 1 if len(query) < 8 else 2
+        matches = []
+        size = len(query)
+        for offset in offsets:
+            key, city = self._row(offset)
+            distances = edit_distances(query, key)
+            # Compare against key prefixes one shorter/longer too, so a
+            # missing or extra character is a single edit
+            distance = min(distances[max(0, size - 1):size + 2] or distances[-1:])
+            if distance <= max_distance:
+                # Ties go to the name that is closest overall
+                matches.append((distance, distances[-1], city))
+        return matches
+
+    def suggest(self, text: str, limit: int = 8) -> List[City]:
+        """
+        Ranked suggestions for partially typed text.
+
+        Prefix matches come first, most populous first. If there are
+        fewer than ``limit`` of them and at least four characters were
+        typed, close misspellings follow, nearest first.
+
+        Args:
+            text: What the user has typed
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of City
+        """
+        query = normalize(text)
+        if not query or self._cities is None or self._index is None:
+            return []
+
+        prefix = self._prefix_matches(query)
+        prefix.sort(key=lambda match: -match[2].population)
+        results = [city for _, _, city in prefix[:limit]]
+
+        if len(results) < limit and len(query) >= min(FUZZY_PREFIX_LENGTHS):
+            fuzzy = self._fuzzy_matches(query, {offset for offset, _, _ in prefix})
+            fuzzy.sort(key=lambda match: (match[0], match[1], -match[2].population))
+            results.extend(city for _, _, city in fuzzy[:limit - len(results)])
+        return results
+
+
+def _read_source(path: str, min_population: int) -> Iterator[City]:
+    """Read cities from a GeoNames dump, a built catalogue or a simple TSV."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 15:
+                # GeoNames: name, asciiname, ..., country code, ..., admin1, ..., population
+                name, country, admin, population = fields[1], fields[8], fields[10], fields[14]
+            elif len(fields) == 5:
+                _, name, country, admin, population = fields
+            elif len(fields) == 4:
+                name, country, admin, population = fields
+            else:
+                continue
+            population = int(population or 0)
+            if name and population >= min_population:
+                yield City(name, country, admin, population)
+
+
+def build(cities: Iterable[City], out_dir: str) -> Tuple[str, str]:
+    """
+    Write cities.tsv and cities.idx for a set of cities.
+
+    Args:
+        cities: Catalogue entries
+        out_dir: Output directory
+
+    Returns:
+        Paths of the written (catalogue, index) files
+    """
+    rows = sorted(
+        ((normalize(city.name), city) for city in cities),
+        key=lambda row: (row[0].encode("utf-8"), -row[1].population),
+    )
+
+    os.makedirs(out_dir, exist_ok=True)
+    tsv_path = os.path.join(out_dir, "cities.tsv")
+    idx_path = os.path.join(out_dir, "cities.idx")
+
+    top: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    deletions: List[str] = []
+    offset = 0
+    with open(tsv_path, "wb") as f:
+        for key, city in rows:
+            if not key:
+                continue
+            line = "\t".join(
+                (key, city.name, city.country, city.admin, str(city.population))
+            ).encode("utf-8") + b"\n"
+            f.write(line)
+
+            for n in range(1, TOP_PREFIX_LENGTH + 1):
+                if len(key) >= n:
+                    top[key[:n]].append((city.population, offset))
+            for n in FUZZY_PREFIX_LENGTHS:
+                if len(key) >= n:
+                    deletions.extend(
+                        f"D{n}{variant}\t{offset}" for variant in set(_deletions(key[:n]))
+                    )
+            offset += len(line)
+
+    lines = deletions
+    for prefix, entries in top.items():
+        entries.sort(key=lambda entry: -entry[0])
+        best = ",".join(str(offset) for _, offset in entries[:TOP_PER_PREFIX])
+        lines.append(f"T{prefix}\t{best}")
+    lines.sort(key=lambda line: line.encode("utf-8"))
+    with open(idx_path, "wb") as f:
+        f.write("".join(line + "\n" for line in lines).encode("utf-8"))
+    return tsv_path, idx_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="City catalogue tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="build cities.tsv and cities.idx")
+    build_parser.add_argument("source", help="GeoNames dump or name/country/admin/population TSV")
+    build_parser.add_argument("out_dir", nargs="?", default=os.path.dirname(DEFAULT_PATH))
+    build_parser.add_argument("--min-population", type=int, default=0)
+
+    search_parser = commands.add_parser("search", help="try a query")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--limit", type=int, default=8)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        cities = list(_read_source(args.source, args.min_population))
+        tsv_path, idx_path = build(cities, args.out_dir)
+        print(f"Wrote {len(cities)} cities to {tsv_path} and {idx_path}")
+    else:
+        for city in CityCatalog().suggest(args.text, args.limit):
+            print(f"{city.display_name}  ({city.population:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,162 @@
 # config.py
-"""Configuration management for the Weather App."""
+"""Configuration management for the Weather App.
+
+Environment-backed settings are resolved lazily: the .env file is read
+once, the first time one of them is accessed, and the parsed values are
+cached. Importing this module touches neither the filesystem nor the
+environment.
+"""
 
 import os
-from dotenv import load_dotenv
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes")
+
+
+class _EnvSetting:
+    """Config attribute read from an environment variable on first use."""
+
+    def __init__(self, env_var: str, default: Any, cast: Callable[[str], Any] = str):
+        self.env_var = env_var
+        self.default = default
+        self.cast = cast
+        self.name = ""
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def resolve(self) -> Any:
+        raw = os.getenv(self.env_var)
+        if raw is None:
+            return self.default
+        return self.cast(raw)
+
+    def __get__(self, instance, owner) -> Any:
+        return owner.settings()[self.name]
+
+
+def env(env_var: str, default: Any, cast: Callable[[str], Any] = str) -> Any:
+    """Declare a lazily resolved setting."""
+    return _EnvSetting(env_var, default, cast)
 
-# Load environment variables from .env file
-load_dotenv()
 
 class Config:
     """Application configuration."""
-    
+
     # API Configuration
-    API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
-    BASE_URL = os.getenv(
-        "OPENWEATHER_BASE_URL", 
+    API_KEY = env("OPENWEATHER_API_KEY", "")
+    BASE_URL = env(
+        "OPENWEATHER_BASE_URL",
         "https://api.openweathermap.org/data/2.5/weather"
     )
-    
+    # Empty: derived from BASE_URL (same path prefix / same host)
+    FORECAST_URL = env("OPENWEATHER_FORECAST_URL", "")
+    GEOCODING_URL = env("OPENWEATHER_GEOCODING_URL", "")
+
     # App Configuration
     APP_TITLE = "Weather App"
     APP_WIDTH = 400
     APP_HEIGHT = 600
-    
+
     # API Settings
     UNITS = "metric"  # metric, imperial, or standard
     TIMEOUT = 10  # seconds
-    
+    CONNECT_TIMEOUT = env("WEATHER_CONNECT_TIMEOUT", 3.0, float)  # seconds
+
+    # HTTP Connection Pool
+    MAX_CONNECTIONS = env("WEATHER_MAX_CONNECTIONS", 20, int)
+    MAX_KEEPALIVE_CONNECTIONS = env("WEATHER_MAX_KEEPALIVE_CONNECTIONS", 10, int)
+    KEEPALIVE_EXPIRY = env("WEATHER_KEEPALIVE_EXPIRY", 30.0, float)  # seconds
+    HTTP2 = env("WEATHER_HTTP2", False, _to_bool)
+
+    # Response Cache
+    CACHE_ENABLED = env("WEATHER_CACHE_ENABLED", True, _to_bool)
+    CACHE_MAX_ENTRIES = env("WEATHER_CACHE_MAX_ENTRIES", 128, int)
+    WEATHER_CACHE_TTL = env("WEATHER_CACHE_TTL", 600.0, float)  # 10 minutes
+    FORECAST_CACHE_TTL = env("FORECAST_CACHE_TTL", 1800.0, float)  # 30 minutes
+    CACHE_STALE_TTL = env("WEATHER_CACHE_STALE_TTL", 3600.0, float)  # seconds
+    GEOCODE_CACHE_TTL = env("GEOCODE_CACHE_TTL", 30 * 24 * 3600.0, float)  # 30 days
+
+    # IP Geolocation ("my location")
+    IP_LOCATION_URL = env("WEATHER_IP_LOCATION_URL", "https://ipapi.co/json/")
+    IP_LOCATION_CACHE_TTL = env("WEATHER_IP_LOCATION_TTL", 3600.0, float)  # 1 hour
+
+    # Persistent Cache (opt-in: set WEATHER_CACHE_DB to a file path, e.g.
+    # cache/weather.db)
+    CACHE_DB_PATH = env("WEATHER_CACHE_DB", "")
+    CACHE_DB_MAX_ENTRIES = env("WEATHER_CACHE_DB_MAX_ENTRIES", 1000, int)
+
+    # Forecast Fetching: eager (every search), lazy (when the tab opens)
+    # or predictive (when the pointer reaches the tab)
+    FORECAST_FETCH_POLICY = env("WEATHER_FORECAST_POLICY", "eager")
+
+    # City Autocomplete (bundled catalogue; set to an empty string to disable)
+    CITY_CATALOG_PATH = env(
+        "WEATHER_CITY_CATALOG",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv"),
+    )
+    CITY_SUGGESTIONS = env("WEATHER_CITY_SUGGESTIONS", 6, int)
+
+    # Observation History (directory for the time-series store; empty disables)
+    OBSERVATIONS_DIR = env("WEATHER_OBSERVATIONS_DIR", "")
+
+    # Bulk Lookups
+    BATCH_CONCURRENCY = env("WEATHER_BATCH_CONCURRENCY", 10, int)
+
+    # Rate Limiting (shared API key budget; 0 disables a limit)
+    RATE_LIMIT_PER_MINUTE = env("OPENWEATHER_CALLS_PER_MINUTE", 60, int)
+    RATE_LIMIT_PER_DAY = env("OPENWEATHER_CALLS_PER_DAY", 30000, int)
+    RATE_LIMIT_MAX_WAIT = env("WEATHER_RATE_LIMIT_MAX_WAIT", 5.0, float)  # seconds
+
+    # Retries and Circuit Breaker
+    MAX_RETRIES = env("WEATHER_MAX_RETRIES", 2, int)
+    RETRY_BACKOFF_BASE = env("WEATHER_RETRY_BACKOFF_BASE", 0.5, float)  # seconds
+    RETRY_BACKOFF_MAX = env("WEATHER_RETRY_BACKOFF_MAX", 4.0, float)  # seconds
+    BREAKER_FAILURE_THRESHOLD = env("WEATHER_BREAKER_FAILURES", 5, int)
+    BREAKER_RESET_TIMEOUT = env("WEATHER_BREAKER_RESET", 30.0, float)  # seconds
+
+    # Background Refresh
+    REFRESH_ENABLED = env("WEATHER_REFRESH_ENABLED", True, _to_bool)
+    REFRESH_INTERVAL = env("WEATHER_REFRESH_INTERVAL", 120.0, float)  # seconds
+    REFRESH_LEAD_TIME = env("WEATHER_REFRESH_LEAD_TIME", 180.0, float)  # seconds before expiry
+    REFRESH_JITTER = env("WEATHER_REFRESH_JITTER", 0.25, float)  # +/- fraction of interval
+    REFRESH_RECENT_CITIES = env("WEATHER_REFRESH_RECENT", 5, int)
+    PINNED_CITIES = env("WEATHER_PINNED_CITIES", "")  # comma-separated
+
+    # Shared API Server (server.py)
+    SERVER_HOST = env("WEATHER_SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = env("WEATHER_SERVER_PORT", 8086, int)
+    SERVER_CLIENT_KEY = env("WEATHER_SERVER_CLIENT_KEY", "")  # empty: any appid
+
+    # Metrics (latency histograms and error counters; off by default)
+    METRICS_ENABLED = env("WEATHER_METRICS_ENABLED", False, _to_bool)
+
+    _settings: Optional[Mapping[str, Any]] = None
+
+    @classmethod
+    def settings(cls) -> Mapping[str, Any]:
+        """Load .env once and return the resolved, read-only settings."""
+        if cls._settings is None:
+            from dotenv import load_dotenv
+
+            # Load environment variables from .env file
+            load_dotenv()
+            cls._settings = MappingProxyType({
+                name: value.resolve()
+                for klass in reversed(cls.__mro__)
+                for name, value in vars(klass).items()
+                if isinstance(value, _EnvSetting)
+            })
+        return cls._settings
+
+    @classmethod
+    def reload(cls):
+        """Forget cached settings so the next access re-reads the environment."""
+        cls._settings = None
+
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
@@ -35,6 +166,3 @@ class Config:
                 "Please create a .env file with your API key."
             )
         return True
-
-# Validate configuration on import
-Config.validate()
\ No newline at end of file
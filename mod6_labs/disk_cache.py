@@ -0,0 +1,218 @@
+# disk_cache.py
+"""Persistent SQLite-backed store for weather responses and app state."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class DiskCache:
+    """
+    SQLite response store that survives restarts.
+
+    Each row keeps the JSON payload with wall-clock expiry timestamps.
+    The store is capped at ``max_entries`` rows; ``compact()`` drops
+    expired rows and the least recently used ones beyond the cap. A small
+    ``meta`` table holds app state such as the last viewed city.
+
+    All operations are best-effort: a broken or locked database never
+    stops a weather lookup, it just behaves like a cache miss.
+
+    Reads do not write: access times are kept in memory and saved with
+    the next write, compaction or close. Operations block on disk I/O,
+    so async callers should run them in a thread; a lock serializes
+    them across threads.
+    """
+
+    # Run compaction automatically after this many writes
+    COMPACT_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 1000, stale_ttl: float = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}  # access times not yet saved
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed
+                ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        """Turn a cache key tuple into a stable text key."""
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Load a stored response.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (payload, seconds until expiry) or None if the entry
+            is missing or too old to serve. The remaining time is negative
+            for stale entries.
+        """
+        now = time.time()
+        text_key = self._encode_key(key)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT payload, expires_at FROM responses WHERE key = ?",
+                    (text_key,),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                payload, expires_at = row
+                if now >= expires_at + self.stale_ttl:
+                    return None
+
+                self._accessed[text_key] = now
+            return json.loads(payload), expires_at - now
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def _save_accessed(self):
+        """Write pending access times (call with the lock held, then commit)."""
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(at, key) for key, at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """
+        Store a response.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable payload
+            ttl: Seconds the payload stays fresh
+        """
+        now = time.time()
+        try:
+            row = (
+                self._encode_key(key),
+                json.dumps(value, separators=(",", ":")),
+                now,
+                now + ttl,
+                now,
+            )
+            with self._lock:
+                self._accessed.pop(row[0], None)
+                self._save_accessed()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, payload, stored_at, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    row,
+                )
+                self._conn.commit()
+                self._writes += 1
+                compact = self._writes % self.COMPACT_EVERY == 1
+        except (sqlite3.Error, TypeError, ValueError):
+            return
+
+        # Compact with the first write of a session, then periodically
+        if compact:
+            self.compact()
+
+    def compact(self):
+        """Drop unservable rows and trim the store to its size cap."""
+        now = time.time()
+        try:
+            with self._lock:
+                self._save_accessed()
+                self._conn.execute(
+                    "DELETE FROM responses WHERE expires_at + ? <= ?",
+                    (self.stale_ttl, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def vacuum(self):
+        """Compact and give freed pages back to the filesystem."""
+        self.compact()
+        try:
+            with self._lock:
+                self._conn.execute("VACUUM")
+        except sqlite3.Error:
+            pass
+
+    def get_meta(self, name: str, default: Any = None) -> Any:
+        """Read a JSON value from the meta table."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value FROM meta WHERE name = ?", (name,)
+                ).fetchone()
+            return json.loads(row[0]) if row else default
+        except (sqlite3.Error, ValueError):
+            return default
+
+    def set_meta(self, name: str, value: Any):
+        """Write a JSON value to the meta table."""
+        try:
+            value = json.dumps(value)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                    (name, value),
+                )
+                self._conn.commit()
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def __len__(self) -> int:
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def close(self):
+        """Save pending access times and close the database connection."""
+        try:
+            with self._lock:
+                self._save_accessed()
+                self._conn.commit()
+                self._conn.close()
+        except sqlite3.Error:
+            pass
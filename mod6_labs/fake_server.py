@@ -0,0 +1,243 @@
+# fake_server.py
+"""Local stand-in for the OpenWeatherMap API.
+
+Replays the recorded responses in ``fixtures/`` for any city, with
+configurable latency, server errors and rate limiting, so WeatherService
+can be exercised and benchmarked without an API key or network access.
+
+Usage:
+    python fake_server.py --port 8085 --latency 0.05 --error-rate 0.02
+
+Then point the app at it:
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8085/data/2.5/weather
+    OPENWEATHER_API_KEY=fake
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from local_http import Request, Response, server_url, start_server
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> Any:
+    """Load a recorded response from the fixtures directory."""
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _coordinates(name: str) -> Tuple[float, float]:
+    """Stable pseudo-coordinates for a city name."""
+    h = zlib.crc32(name.lower().encode())
+    lat = round((h % 14000) / 100 - 70, 4)
+    lon = round((h // 14000 % 36000) / 100 - 180, 4)
+    return lat, lon
+
+
+class FakeOpenWeather:
+    """
+    Request handler serving fixture data.
+
+    Every city resolves (except the ones listed as unknown) to a location
+    whose coordinates are derived from its name, so distinct cities get
+    distinct cache keys.
+
+    Args:
+        latency: Base response delay in seconds
+        jitter: Extra random delay in seconds (uniform 0..jitter)
+        error_rate: Fraction of requests answered with a 5xx error
+        throttle_rate: Fraction of requests answered with 429
+        retry_after: Retry-After value sent with 429 responses
+        unknown_cities: City names answered as "city not found"
+        seed: Seed for the error/latency random generator
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        unknown_cities: Iterable[str] = (),
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.unknown_cities = {city.lower() for city in unknown_cities}
+        self._random = random.Random(seed)
+        # Names of geocoded places, so coordinate lookups report them
+        self._names: Dict[Tuple[float, float], str] = {}
+
+        self.weather = load_fixture("weather")
+        self.forecast = load_fixture("forecast")
+        self.geocoding = load_fixture("geocoding")
+
+        self.routes = {
+            "/data/2.5/weather": self.current_weather,
+            "/data/2.5/forecast": self.forecast_series,
+            "/geo/1.0/direct": self.geocode,
+        }
+
+        # Counters
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    async def __call__(self, request: Request) -> Response:
+        self.requests += 1
+        route = self.routes.get(request.path)
+        if route is None:
+            return Response.error(404, "Not found")
+
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            self.throttled += 1
+            return Response.error(
+                429, "Your account is temporary blocked due to exceeding of "
+                     "requests limitation of your subscription type.",
+                {"Retry-After": str(self.retry_after)},
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            self.errors += 1
+            return Response.error(503, "Service temporarily unavailable")
+
+        if request.query.get("appid", "") == "":
+            return Response.error(401, "Invalid API key. Please see "
+                                       "https://openweathermap.org/faq#error401 for more info.")
+        try:
+            return route(request.query)
+        except ValueError as e:
+            # Malformed coordinates get a 400, as from the real API
+            return Response.error(400, str(e))
+
+    def _location(self, query: Dict[str, str]) -> Optional[Tuple[str, float, float]]:
+        """
+        City name and coordinates a request refers to, or None if unknown.
+
+        Raises:
+            ValueError: If lat or lon is not a valid coordinate
+        """
+        if "lat" in query and "lon" in query:
+            try:
+                lat, lon = float(query["lat"]), float(query["lon"])
+            except ValueError:
+                raise ValueError("wrong latitude or longitude") from None
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ValueError("wrong latitude or longitude")
+            name = self._names.get((round(lat, 2), round(lon, 2)))
+            return name or f"Place {lat:.2f},{lon:.2f}", lat, lon
+
+        city = query.get("q", "").split(",")[0].strip()
+        if not city or city.lower() in self.unknown_cities:
+            return None
+        name = city.title()
+        lat, lon = _coordinates(name)
+        self._names[(round(lat, 2), round(lon, 2))] = name
+        return name, lat, lon
+
+    def current_weather(self, query: Dict[str, str]) -> Response:
+        location = self._location(query)
+        if location is None:
+            return Response.error(404, "city not found")
+        name, lat, lon = location
+
+        data = copy.deepcopy(self.weather)
+        data["name"] = name
+        data["id"] = zlib.crc32(name.encode()) % 10_000_000
+        data["coord"] = {"lon": lon, "lat": lat}
+        return Response.json(data)
+
+    def forecast_series(self, query: Dict[str, str]) -> Response:
+        location = self._location(query)
+        if location is None:
+            return Response.error(404, "city not found")
+        name, lat, lon = location
+
+        data = copy.copy(self.forecast)
+        data["city"] = dict(
+            self.forecast["city"],
+            name=name,
+            id=zlib.crc32(name.encode()) % 10_000_000,
+            coord={"lat": lat, "lon": lon},
+        )
+        return Response.json(data)
+
+    def geocode(self, query: Dict[str, str]) -> Response:
+        location = self._location(query)
+        if location is None:
+            return Response.json([])
+        name, lat, lon = location
+
+        place = dict(self.geocoding[0], name=name, lat=lat, lon=lon)
+        place["local_names"] = {"en": name}
+        return Response.json([place])
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Request counters."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+        }
+
+
+async def serve(app: FakeOpenWeather, host: str, port: int):
+    server = await start_server(app, host, port)
+    url = server_url(server)
+    print(f"Fake OpenWeather API listening on {url}")
+    print("Point the app at it with:")
+    print(f"  OPENWEATHER_BASE_URL={url}/data/2.5/weather")
+    print("  OPENWEATHER_API_KEY=fake")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake OpenWeatherMap API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1, help="seconds")
+    parser.add_argument(
+        "--unknown", action="append", default=[],
+        help="city name to answer with 404 (repeatable)",
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    app = FakeOpenWeather(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        unknown_cities=args.unknown,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(serve(app, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
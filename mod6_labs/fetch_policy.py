@@ -0,0 +1,156 @@
+# fetch_policy.py
+"""When to fetch the 5-day forecast for a search.
+
+The forecast tab starts hidden, so fetching the forecast with every
+search spends an API call that is wasted whenever the tab is not opened.
+
+Policies:
+    eager       fetch with every search (forecast ready when the tab opens)
+    lazy        fetch when the forecast tab is opened
+    predictive  fetch when the pointer moves onto the forecast tab, or
+                when it is opened without that
+
+Usage counters are kept whichever policy is active. They record how
+many searches had the tab hovered and how many had it opened. That is
+enough to work out what each policy would have cost the same users.
+
+Background refresh (refresh_scheduler.py) is the one other source of
+forecast calls. Under the lazy and predictive policies it only keeps
+already-loaded forecasts warm. Its calls are counted separately as
+``background_fetches`` and are left out of the per-policy estimates.
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Mapping, Optional
+
+from config import Config
+
+EAGER = "eager"
+LAZY = "lazy"
+PREDICTIVE = "predictive"
+POLICIES = (EAGER, LAZY, PREDICTIVE)
+
+logger = logging.getLogger(__name__)
+
+# Persisted usage counters
+USAGE_KEYS = (
+    "searches",  # searches that showed results
+    "forecast_fetches",  # forecast requests actually made
+    "intents",  # searches where the forecast tab was hovered
+    "views",  # searches where the forecast tab was opened
+    "views_without_intent",  # opened without a hover first (keyboard, touch)
+    "wasted_fetches",  # fetched forecasts that were never viewed
+    "view_waits",  # tab opened before the forecast had been fetched
+    "background_fetches",  # forecasts refreshed by the background scheduler
+)
+
+
+class ForecastFetchPolicy:
+    """
+    Forecast fetch decisions for the current search, plus usage counters.
+
+    The app reports what happens to each search (``start_search``,
+    ``on_intent``, ``on_view``, ``on_fetch``). Each of these returns
+    whether the forecast should be fetched now.
+
+    Args:
+        policy: One of POLICIES. Defaults to Config.FORECAST_FETCH_POLICY;
+            an unknown configured name is logged and treated as eager, so
+            a typo in an optional setting does not stop the app
+        usage: Counters from an earlier session, to continue counting
+
+    Raises:
+        ValueError: If an explicitly passed policy is unknown
+    """
+
+    def __init__(self, policy: Optional[str] = None,
+                 usage: Optional[Mapping[str, int]] = None):
+        if policy is None:
+            policy = Config.FORECAST_FETCH_POLICY.lower()
+            if policy not in POLICIES:
+                logger.warning(
+                    "Unknown WEATHER_FORECAST_POLICY %r; using %r", policy, EAGER
+                )
+                policy = EAGER
+        elif policy.lower() not in POLICIES:
+            raise ValueError(
+                f"Unknown forecast fetch policy {policy!r}; "
+                f"expected one of {', '.join(POLICIES)}"
+            )
+        self.policy = policy.lower()
+        self.usage: Counter = Counter({
+            key: int(value) for key, value in (usage or {}).items()
+            if key in USAGE_KEYS
+        })
+
+        # State of the current search
+        self._active = False
+        self._fetched = False
+        self._intent = False
+        self._viewed = False
+
+    def _finish_search(self):
+        if self._active and self._fetched and not self._viewed:
+            self.usage["wasted_fetches"] += 1
+        self._active = self._fetched = self._intent = self._viewed = False
+
+    def start_search(self) -> bool:
+        """A search is showing results. Returns whether to fetch now."""
+        self._finish_search()
+        self._active = True
+        self.usage["searches"] += 1
+        return self.policy == EAGER
+
+    def on_intent(self) -> bool:
+        """The pointer is on the forecast tab. Returns whether to fetch now."""
+        if not self._active:
+            return False
+        if not self._intent and not self._viewed:
+            self._intent = True
+            self.usage["intents"] += 1
+        return self.policy == PREDICTIVE and not self._fetched
+
+    def on_view(self) -> bool:
+        """The forecast tab was opened. Returns whether to fetch now."""
+        if not self._active:
+            return False
+        if not self._viewed:
+            self._viewed = True
+            self.usage["views"] += 1
+            if not self._intent:
+                self.usage["views_without_intent"] += 1
+            if not self._fetched:
+                self.usage["view_waits"] += 1
+        return not self._fetched
+
+    def on_fetch(self):
+        """A forecast request was made for the current search."""
+        self._fetched = True
+        self.usage["forecast_fetches"] += 1
+
+    def on_background_fetch(self):
+        """The background scheduler refreshed a forecast."""
+        self.usage["background_fetches"] += 1
+
+    @property
+    def fetched(self) -> bool:
+        """Whether the current search's forecast has been requested."""
+        return self._fetched
+
+    def estimated_calls(self) -> Dict[str, int]:
+        """Forecast requests each policy would have made for the same searches."""
+        return {
+            EAGER: self.usage["searches"],
+            LAZY: self.usage["views"],
+            PREDICTIVE: self.usage["intents"] + self.usage["views_without_intent"],
+        }
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Active policy, usage counters and per-policy call estimates."""
+        stats: Dict[str, object] = {"policy": self.policy}
+        stats.update({key: self.usage[key] for key in USAGE_KEYS})
+        for policy, calls in self.estimated_calls().items():
+            stats[f"calls_if_{policy}"] = calls
+        return stats
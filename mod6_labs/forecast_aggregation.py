@@ -0,0 +1,148 @@
+# forecast_aggregation.py
+"""Vectorized daily summaries for 3-hourly forecasts."""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import chain
+from typing import List, Sequence
+
+import numpy as np
+
+from models import ForecastSeries
+
+SECONDS_PER_DAY = 86400
+_EPOCH = date(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class DailySummary:
+    """Aggregated forecast for one local calendar day."""
+
+    __slots__ = ("date", "high", "low", "condition", "icon", "precipitation", "pop")
+
+    date: date  # in the city's local time
+    high: float
+    low: float
+    condition: str  # most frequent description
+    icon: str  # most frequent icon
+    precipitation: float  # total rain + snow, mm
+    pop: float  # highest probability of precipitation, 0-1
+
+
+def _group_mode(group_ids: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Most frequent value per group.
+
+    Args:
+        group_ids: Group index for each element
+        values: Values to take the mode of (any hashable dtype)
+        n_groups: Number of groups
+
+    Returns:
+        Array of length n_groups with each group's mode (ties go to the
+        value that sorts first)
+    """
+    categories, codes = np.unique(values, return_inverse=True)
+    n_codes = len(categories)
+
+    # Count each (group, code) pair, then keep the largest count per group
+    pairs, counts = np.unique(group_ids * n_codes + codes, return_counts=True)
+    pair_groups = pairs // n_codes
+    order = np.lexsort((-counts, pair_groups))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pair_groups[order][1:] != pair_groups[order][:-1]
+
+    best = np.empty(n_groups, dtype=np.int64)
+    best[pair_groups[order][first]] = pairs[order][first] % n_codes
+    return categories[best]
+
+
+def summarize_many(
+    forecasts: Sequence[ForecastSeries],
+    days: int = 5,
+) -> List[List[DailySummary]]:
+    """
+    Summarize many forecasts per local day in one batched pass.
+
+    Each forecast's entries are bucketed into calendar days using its own
+    UTC offset (``ForecastSeries.timezone``), so days start at the city's
+    local midnight.
+
+    Args:
+        forecasts: Forecast series, one per city
+        days: Maximum number of days to return per city
+
+    Returns:
+        One list of DailySummary per input forecast, in date order
+    """
+    lengths = np.fromiter((len(f) for f in forecasts), dtype=np.int64, count=len(forecasts))
+    total = int(lengths.sum())
+    if total == 0:
+        return [[] for _ in forecasts]
+
+    def column(name: str, dtype) -> np.ndarray:
+        values = chain.from_iterable(getattr(f, name) for f in forecasts)
+        return np.fromiter(values, dtype=dtype, count=total)
+
+    city = np.repeat(np.arange(len(forecasts)), lengths)
+    offsets = np.repeat(
+        np.fromiter((f.timezone for f in forecasts), dtype=np.int64, count=len(forecasts)),
+        lengths,
+    )
+    local_day = (column("times", np.int64) + offsets) // SECONDS_PER_DAY
+    temps = column("temps", np.float64)
+    pops = column("pops", np.float64)
+    precipitation = column("precipitation", np.float64)
+    descriptions = np.array(list(chain.from_iterable(f.descriptions for f in forecasts)))
+    icons = np.array(list(chain.from_iterable(f.icons for f in forecasts)))
+
+    # Sort by (city, day) so every group is a contiguous run
+    order = np.lexsort((local_day, city))
+    city, local_day = city[order], local_day[order]
+    temps, pops, precipitation = temps[order], pops[order], precipitation[order]
+    descriptions, icons = descriptions[order], icons[order]
+
+    new_group = np.ones(total, dtype=bool)
+    new_group[1:] = (city[1:] != city[:-1]) | (local_day[1:] != local_day[:-1])
+    starts = np.flatnonzero(new_group)
+    n_groups = len(starts)
+    group_ids = np.cumsum(new_group) - 1
+
+    highs = np.maximum.reduceat(temps, starts)
+    lows = np.minimum.reduceat(temps, starts)
+    max_pops = np.maximum.reduceat(pops, starts)
+    totals = np.add.reduceat(precipitation, starts)
+    conditions = _group_mode(group_ids, descriptions, n_groups)
+    common_icons = _group_mode(group_ids, icons, n_groups)
+
+    # Position of each day within its city, to keep only the first `days`
+    group_city = city[starts]
+    city_first_group = np.searchsorted(group_city, group_city)
+    day_rank = np.arange(n_groups) - city_first_group
+
+    results: List[List[DailySummary]] = [[] for _ in forecasts]
+    for g in np.flatnonzero(day_rank < days):
+        results[group_city[g]].append(DailySummary(
+            date=_EPOCH + timedelta(days=int(local_day[starts[g]])),
+            high=float(highs[g]),
+            low=float(lows[g]),
+            condition=str(conditions[g]),
+            icon=str(common_icons[g]),
+            precipitation=float(totals[g]),
+            pop=float(max_pops[g]),
+        ))
+    return results
+
+
+def summarize_daily(forecast: ForecastSeries, days: int = 5) -> List[DailySummary]:
+    """
+    Summarize a single forecast per local day.
+
+    Args:
+        forecast: 3-hourly forecast series
+        days: Maximum number of days to return
+
+    Returns:
+        DailySummary per day, in date order
+    """
+    return summarize_many([forecast], days)[0]
@@ -0,0 +1,180 @@
+# local_http.py
+"""Minimal asyncio HTTP/1.1 server for local tools (fake API, shared cache).
+
+Only what the weather endpoints need: GET requests with query strings,
+JSON responses and keep-alive connections. Not meant to face the
+internet.
+"""
+
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_HEADER_BYTES = 16 * 1024
+IDLE_TIMEOUT = 30.0  # seconds a keep-alive connection may wait for a request
+
+
+class Request:
+    """A parsed HTTP request."""
+
+    __slots__ = ("method", "path", "query", "headers")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str],
+                 headers: Dict[str, str]):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+
+
+class Response:
+    """An HTTP response with a bytes body."""
+
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status: int = 200, body: bytes = b"",
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, data: Any, status: int = 200,
+             headers: Optional[Dict[str, str]] = None) -> "Response":
+        """Build a JSON response."""
+        body = json.dumps(data, separators=(",", ":")).encode()
+        response = cls(status, body, headers)
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+        return response
+
+    @classmethod
+    def error(cls, status: int, message: str,
+              headers: Optional[Dict[str, str]] = None) -> "Response":
+        """Build an OpenWeather-style JSON error."""
+        return cls.json({"cod": status, "message": message}, status, headers)
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+def _encode(response: Response, keep_alive: bool) -> bytes:
+    try:
+        reason = HTTPStatus(response.status).phrase
+    except ValueError:
+        reason = "Unknown"
+
+    headers = dict(response.headers)
+    headers["Content-Length"] = str(len(response.body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+    head = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(
+        f"{name}: {value}\r\n" for name, value in headers.items()
+    )
+    return head.encode("latin-1") + b"\r\n" + response.body
+
+
+async def _read_request(reader: asyncio.StreamReader,
+                        timeout: Optional[float] = None) -> Optional[Request]:
+    """
+    Read one request, or None when the client closed the connection or
+    sent nothing within ``timeout`` seconds.
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise ValueError("Request headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    # Discard any body; the endpoints are GET-only
+    length = int(headers.get("content-length", "0") or 0)
+    if length:
+        await reader.readexactly(length)
+
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers)
+
+
+def make_connection_handler(handler: Handler, idle_timeout: Optional[float] = IDLE_TIMEOUT):
+    """
+    Wrap a request handler into an asyncio.start_server callback.
+
+    Args:
+        handler: Coroutine function mapping a Request to a Response
+        idle_timeout: Seconds to wait for the next request on a connection
+            before closing it (None waits forever)
+    """
+
+    async def on_connection(reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader, idle_timeout)
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(_encode(Response.error(400, "Bad request"), False))
+                    break
+                if request is None:
+                    break
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                if request.method != "GET":
+                    response = Response.error(405, "Method not allowed")
+                else:
+                    try:
+                        response = await handler(request)
+                    except Exception as e:
+                        response = Response.error(500, f"Internal error: {e}")
+
+                writer.write(_encode(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # Server shutdown cancels open connections. Ending the task
+            # normally keeps asyncio.start_server from logging each one.
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    return on_connection
+
+
+async def start_server(handler: Handler, host: str = "127.0.0.1", port: int = 0,
+                       idle_timeout: Optional[float] = IDLE_TIMEOUT) -> asyncio.AbstractServer:
+    """
+    Start serving a request handler.
+
+    Args:
+        handler: Coroutine function mapping a Request to a Response
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        idle_timeout: Seconds an idle keep-alive connection is kept open
+
+    Returns:
+        The running asyncio server
+    """
+    return await asyncio.start_server(
+        make_connection_handler(handler, idle_timeout), host, port,
+        limit=MAX_HEADER_BYTES
+    )
+
+
+def server_url(server: asyncio.AbstractServer) -> str:
+    """Base URL (scheme://host:port) of a running server."""
+    host, port = server.sockets[0].getsockname()[:2]
+    return f"http://{host}:{port}"
@@ -2,9 +2,16 @@
 
 import flet as ft
 import asyncio
-from datetime import datetime
+import threading
+from models import CurrentWeather, ForecastSeries
+from refresh_scheduler import RefreshScheduler
+from update_scheduler import UpdateScheduler
 from weather_service import WeatherService
 from config import Config
+from fetch_policy import EAGER, ForecastFetchPolicy
+import themes
+
+FORECAST_DAYS = 5
 
 
 class WeatherApp:
@@ -12,12 +19,45 @@ class WeatherApp:
     
     def __init__(self, page: ft.Page):
         self.page = page
-        self.weather_service = WeatherService()
+        # Handlers mark the page dirty; one update is sent per frame
+        self.updates = UpdateScheduler(page)
         self.search_history = []
+        self.city_catalog = None  # opened on first keystroke
+        # Keystroke handlers run on a thread pool; the lock serializes
+        # opening, searching and closing the catalogue
+        self.catalog_lock = threading.Lock()
+        self.catalog_closed = False
         self.current_theme = "light"
+        self.cards = []  # containers filled with the palette's card color
         self.current_city = ""  # Store current city for forecast
         self.setup_page()
         self.build_ui()
+        
+        # Created after the first paint; httpx loads on the first request
+        self.weather_service = WeatherService()
+        
+        # Decides when forecasts are fetched; counters persist across sessions
+        self.fetch_policy = ForecastFetchPolicy(usage=self.weather_service.load_usage())
+        self.weather_service.metrics.register_collector(
+            "forecast_policy", lambda: self.fetch_policy.stats
+        )
+        
+        # Background refresh only fetches new forecasts under the eager policy
+        self.refresh_scheduler = RefreshScheduler(
+            self.weather_service,
+            fetch_forecasts=self.fetch_policy.policy == EAGER,
+            on_forecast_refresh=self.fetch_policy.on_background_fetch,
+        )
+        self.refresh_task = None
+        self.forecast_request = None  # fetches the shown search's forecast
+        self.forecast_task = None
+        
+        # Only the latest search may use the network and render
+        self.search_task = None
+        self.search_generation = 0
+        
+        self.restore_session()
+        self.start_background_refresh()
     
     def setup_page(self):
         """Configure page settings."""
@@ -33,98 +73,71 @@ class WeatherApp:
         
         # Enable hidden scrolling
         self.page.scroll = ft.ScrollMode.HIDDEN
+        
+        # Release pooled HTTP connections when the session ends
+        self.page.on_close = self.on_page_close
+        
+        # Pause background refresh while the window is hidden
+        self.page.on_app_lifecycle_state_change = self.on_lifecycle_change
+        self.page.window.on_event = self.on_window_event
     
-    def get_theme_colors(self):
-        """Get colors based on current theme."""
-        if self.current_theme == "light":
-            return {
-                "bg": ft.Colors.WHITE,
-                "title": ft.Colors.BLUE_700,
-                "input_border": ft.Colors.BLUE_400,
-                "input_bg": ft.Colors.WHITE,
-                "input_text": ft.Colors.BLACK,
-                "input_label": ft.Colors.BLUE_600,
-                "button_bg": ft.Colors.BLUE_700,
-                "button_text": ft.Colors.WHITE,
-                "location_button_bg": ft.Colors.GREEN_700,
-                "container_bg": ft.Colors.BLUE_50,
-                "card_bg": ft.Colors.WHITE,
-                "text_primary": ft.Colors.BLACK,
-                "text_secondary": ft.Colors.GREY_700,
-                "temp_color": ft.Colors.BLUE_900,
-                "icon_color": ft.Colors.BLUE_700,
-                "error_color": ft.Colors.RED_700,
-                "dropdown_bg": ft.Colors.WHITE,
-                "divider": ft.Colors.BLUE_200,
-                "tab_bg": ft.Colors.BLUE_100,
-                "suggestion_hover": ft.Colors.GREY_100,
-            }
-        elif self.current_theme == "dark":
-            return {
-                "bg": "#121212",
-                "title": ft.Colors.BLUE_300,
-                "input_border": ft.Colors.BLUE_700,
-                "input_bg": "#1e1e1e",
-                "input_text": ft.Colors.WHITE,
-                "input_label": ft.Colors.BLUE_400,
-                "button_bg": ft.Colors.BLUE_800,
-                "button_text": ft.Colors.WHITE,
-                "location_button_bg": ft.Colors.GREEN_800,
-                "container_bg": "#1e1e1e",
-                "card_bg": "#2d2d2d",
-                "text_primary": ft.Colors.WHITE,
-                "text_secondary": ft.Colors.GREY_400,
-                "temp_color": ft.Colors.BLUE_300,
-                "icon_color": ft.Colors.BLUE_400,
-                "error_color": ft.Colors.RED_300,
-                "dropdown_bg": "#1e1e1e",
-                "divider": ft.Colors.BLUE_900,
-                "tab_bg": "#2d2d2d",
-                "suggestion_hover": "#3d3d3d",
-            }
-        else:  # pink
-            return {
-                "bg": "#fff0f5",
-                "title": ft.Colors.PINK_700,
-                "input_border": ft.Colors.PINK_300,
-                "input_bg": ft.Colors.WHITE,
-                "input_text": ft.Colors.PINK_900,
-                "input_label": ft.Colors.PINK_600,
-                "button_bg": ft.Colors.PINK_400,
-                "button_text": ft.Colors.WHITE,
-                "location_button_bg": ft.Colors.PINK_500,
-                "container_bg": "#ffe4f0",
-                "card_bg": ft.Colors.WHITE,
-                "text_primary": ft.Colors.PINK_900,
-                "text_secondary": ft.Colors.PINK_700,
-                "temp_color": ft.Colors.PINK_800,
-                "icon_color": ft.Colors.PINK_600,
-                "error_color": ft.Colors.RED_700,
-                "dropdown_bg": ft.Colors.WHITE,
-                "divider": ft.Colors.PINK_200,
-                "tab_bg": "#ffe4f0",
-                "suggestion_hover": "#ffe4f0",
-            }
+    def on_page_close(self, e):
+        """Stop background work and close the weather service's HTTP client."""
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+        if self.search_task is not None:
+            self.search_task.cancel()
+        if self.forecast_task is not None:
+            self.forecast_task.cancel()
+        self.updates.close()
+        self.weather_service.save_usage(dict(self.fetch_policy.usage))
+        self.page.run_task(self.weather_service.aclose)
+        # Waits for a search in progress; later keystrokes find it closed
+        with self.catalog_lock:
+            self.catalog_closed = True
+            if self.city_catalog is not None:
+                self.city_catalog.close()
+                self.city_catalog = None
+    
+    def start_background_refresh(self):
+        """Keep recent and pinned cities warm in the cache."""
+        if Config.REFRESH_ENABLED:
+            self.refresh_scheduler.set_recent(self.search_history)
+            self.refresh_task = self.page.run_task(self.refresh_scheduler.run)
+    
+    async def on_lifecycle_change(self, e):
+        """Pause or resume background refresh with app visibility."""
+        # Async so it runs on the page loop, which owns the scheduler's Event
+        if e.state in (ft.AppLifecycleState.HIDE, ft.AppLifecycleState.PAUSE):
+            self.refresh_scheduler.pause()
+        elif e.state in (ft.AppLifecycleState.SHOW, ft.AppLifecycleState.RESUME):
+            self.refresh_scheduler.resume()
+    
+    async def on_window_event(self, e):
+        """Pause background refresh while minimized."""
+        if e.type == ft.WindowEventType.MINIMIZE:
+            self.refresh_scheduler.pause()
+        elif e.type in (ft.WindowEventType.RESTORE, ft.WindowEventType.FOCUS):
+            self.refresh_scheduler.resume()
     
     def build_ui(self):
         """Build the user interface."""
-        colors = self.get_theme_colors()
-        
-        # Set page background
-        self.page.bgcolor = colors["bg"]
+        # Colors are theme roles, resolved from the page theme (except the
+        # card and input fills, see apply_fills)
+        themes.apply_theme(self.page, self.current_theme)
         
         # Title
         self.title = ft.Text(
             "Weather App",
             size=32,
             weight=ft.FontWeight.BOLD,
-            color=colors["title"],
+            color=themes.TITLE,
         )
         
         # Theme toggle button
         self.theme_button = ft.IconButton(
-            icon=ft.Icons.SUNNY,
-            icon_color=colors["icon_color"],
+            icon=themes.PALETTES[self.current_theme].icon,
+            icon_color=themes.ICON_COLOR,
             tooltip="Change theme (Light/Dark/Pink)",
             on_click=self.cycle_theme,
         )
@@ -141,13 +154,11 @@ class WeatherApp:
         # City input field
         self.city_input = ft.TextField(
             label="Enter city name",
-            label_style=ft.TextStyle(color=colors["input_label"]),
-            text_style=ft.TextStyle(color=colors["input_text"]),
+            text_style=ft.TextStyle(color=themes.TEXT_PRIMARY),
             hint_text="e.g., London, Tokyo, New York",
-            hint_style=ft.TextStyle(color=colors["text_secondary"]),
-            border_color=colors["input_border"],
-            focused_border_color=colors["icon_color"],
-            bgcolor=colors["input_bg"],
+            hint_style=ft.TextStyle(color=themes.TEXT_SECONDARY),
+            border_color=themes.INPUT_BORDER,
+            focused_border_color=themes.ICON_COLOR,
             prefix_icon=ft.Icons.LOCATION_CITY,
             autofocus=True,
             on_submit=self.on_search,
@@ -169,10 +180,7 @@ class WeatherApp:
             "Get Weather",
             icon=ft.Icons.SEARCH,
             on_click=self.on_search,
-            style=ft.ButtonStyle(
-                color=colors["button_text"],
-                bgcolor=colors["button_bg"],
-            ),
+            style=themes.SEARCH_BUTTON_STYLE,
         )
         
         # Location button
@@ -180,10 +188,7 @@ class WeatherApp:
             "Use My Location",
             icon=ft.Icons.MY_LOCATION,
             on_click=self.on_location_search,
-            style=ft.ButtonStyle(
-                color=colors["button_text"],
-                bgcolor=colors["location_button_bg"],
-            ),
+            style=themes.LOCATION_BUTTON_STYLE,
         )
         
         # Button row
@@ -195,13 +200,15 @@ class WeatherApp:
         
         # Tabs for Current Weather and Forecast
         self.weather_tab = ft.Tab(
-            text="Current",
-            icon=ft.Icons.WB_SUNNY,
+            tab_content=self.create_tab_label(ft.Icons.WB_SUNNY, "Current"),
         )
         
+        # Hovering the forecast tab can trigger a predictive fetch
         self.forecast_tab = ft.Tab(
-            text="5-Day Forecast",
-            icon=ft.Icons.CALENDAR_MONTH,
+            tab_content=self.create_tab_label(
+                ft.Icons.CALENDAR_MONTH, "5-Day Forecast",
+                on_hover=self.on_forecast_tab_hover,
+            ),
         )
         
         self.tabs = ft.Tabs(
@@ -211,15 +218,19 @@ class WeatherApp:
             visible=False,
         )
         
-        # Weather containers
-        self.weather_container = ft.Container(visible=False)
-        self.forecast_container = ft.Container(visible=False)
+        # Weather containers (built once, filled in by each search)
+        self.weather_container = ft.Container(
+            content=self.build_weather_view(), visible=False
+        )
+        self.forecast_container = ft.Container(
+            content=self.build_forecast_view(), visible=False
+        )
         
         # Error message
-        self.error_message = ft.Text("", color=colors["error_color"], visible=False)
+        self.error_message = ft.Text("", color=themes.ERROR_COLOR, visible=False)
         
         # Loading indicator
-        self.loading = ft.ProgressRing(visible=False, color=colors["icon_color"])
+        self.loading = ft.ProgressRing(visible=False, color=themes.ICON_COLOR)
         
         # Main column
         self.main_column = ft.Column(
@@ -240,57 +251,33 @@ class WeatherApp:
             scroll=ft.ScrollMode.HIDDEN,
         )
         
+        self.apply_fills()
+        
         # Add to page
         self.page.add(self.main_column)
     
+    def apply_fills(self):
+        """Set the current palette's card and input fills."""
+        themes.input_style(self.city_input, self.current_theme)
+        bgcolor = themes.card_bg(self.current_theme)
+        for card in self.cards:
+            card.bgcolor = bgcolor
+        for container in self.suggestions_column.controls:
+            container.bgcolor = bgcolor
+            for row in container.content.controls:
+                row.bgcolor = bgcolor
+    
     def cycle_theme(self, e):
         """Cycle through light -> dark -> pink themes."""
-        if self.current_theme == "light":
-            self.current_theme = "dark"
-            self.theme_button.icon = ft.Icons.DARK_MODE
-        elif self.current_theme == "dark":
-            self.current_theme = "pink"
-            self.theme_button.icon = ft.Icons.FAVORITE
-        else:
-            self.current_theme = "light"
-            self.theme_button.icon = ft.Icons.SUNNY
+        self.current_theme = themes.next_theme(self.current_theme)
+        self.theme_button.icon = themes.PALETTES[self.current_theme].icon
         
-        self.update_all_colors()
-        self.page.update()
+        # The page theme recolors the controls; only the fills are set here
+        themes.apply_theme(self.page, self.current_theme)
+        self.apply_fills()
+        self.updates.flush()
     
-    def update_all_colors(self):
-        """Update all UI colors including forecast."""
-        colors = self.get_theme_colors()
-        
-        self.page.bgcolor = colors["bg"]
-        self.title.color = colors["title"]
-        self.theme_button.icon_color = colors["icon_color"]
-        
-        self.city_input.border_color = colors["input_border"]
-        self.city_input.focused_border_color = colors["icon_color"]
-        self.city_input.bgcolor = colors["input_bg"]
-        self.city_input.label_style = ft.TextStyle(color=colors["input_label"])
-        self.city_input.text_style = ft.TextStyle(color=colors["input_text"])
-        
-        self.search_button.style = ft.ButtonStyle(
-            color=colors["button_text"], bgcolor=colors["button_bg"]
-        )
-        self.location_button.style = ft.ButtonStyle(
-            color=colors["button_text"], bgcolor=colors["location_button_bg"]
-        )
-        
-        self.error_message.color = colors["error_color"]
-        self.loading.color = colors["icon_color"]
-        
-        # Update weather container colors if visible
-        if self.weather_container.visible and self.weather_container.content:
-            self.update_weather_colors()
-        
-        # Update forecast container colors if visible
-        if self.forecast_container.visible and self.forecast_container.content:
-            self.update_forecast_colors()
-    
-    def on_tab_change(self, e):
+    async def on_tab_change(self, e):
         """Handle tab changes."""
         if e.control.selected_index == 0:  # Current Weather
             self.weather_container.visible = True
@@ -298,34 +285,81 @@ class WeatherApp:
         else:  # Forecast
             self.weather_container.visible = False
             self.forecast_container.visible = True
-        self.page.update()
+            if self.fetch_policy.on_view():
+                self.start_forecast(self.search_generation)
+        self.updates.flush()
+    
+    async def on_forecast_tab_hover(self, e):
+        """Prefetch the forecast when the pointer reaches its tab."""
+        if e.data == "true" and self.fetch_policy.on_intent():
+            self.start_forecast(self.search_generation)
+            self.updates.request()
+    
+    def start_search(self, handler):
+        """Run a search task, cancelling the one it supersedes."""
+        self.search_generation += 1
+        if self.search_task is not None and not self.search_task.done():
+            # Cancels the pending HTTP requests as well
+            self.search_task.cancel()
+        if self.forecast_task is not None and not self.forecast_task.done():
+            self.forecast_task.cancel()
+        self.forecast_request = None
+        self.search_task = self.page.run_task(handler, self.search_generation)
+    
+    def is_current_search(self, generation: int) -> bool:
+        """Whether no newer search has started since this one."""
+        return generation == self.search_generation
     
     def on_search(self, e):
         """Handle search."""
-        self.page.run_task(self.get_weather_and_forecast)
+        self.start_search(self.get_weather_and_forecast)
     
     def on_location_search(self, e):
         """Handle location search."""
-        self.page.run_task(self.get_location_weather)
+        self.start_search(self.get_location_weather)
+    
+    def get_city_catalog(self):
+        """
+        Open the bundled city catalogue, or None if it is unavailable.
+
+        Call with catalog_lock held.
+        """
+        if self.city_catalog is None and Config.CITY_CATALOG_PATH and not self.catalog_closed:
+            from city_catalog import CityCatalog
+            try:
+                self.city_catalog = CityCatalog(Config.CITY_CATALOG_PATH)
+            except OSError:
+                pass  # missing catalogue: history-only suggestions
+        return self.city_catalog
     
     def on_input_change(self, e):
         """Handle input changes."""
         search_text = self.city_input.value.strip().lower()
         
-        if not search_text or len(self.search_history) == 0:
+        if not search_text:
             self.suggestions_column.visible = False
-            self.page.update()
+            self.updates.request()
             return
         
         matching_cities = [
             city for city in self.search_history if search_text in city.lower()
         ]
         
+        # Then cities from the catalogue, skipping ones already in history
+        with self.catalog_lock:
+            catalog = self.get_city_catalog()
+            cities = catalog.suggest(search_text, Config.CITY_SUGGESTIONS) if catalog else []
+        seen = {city.lower() for city in matching_cities}
+        matching_cities += [
+            city for city in cities
+            if city.name.lower() not in seen and city.query.lower() not in seen
+        ]
+        
         if matching_cities:
             self.show_suggestions(matching_cities)
         else:
             self.suggestions_column.visible = False
-            self.page.update()
+            self.updates.request()
     
     def on_input_focus(self, e):
         """Show all suggestions on focus."""
@@ -337,57 +371,56 @@ class WeatherApp:
         async def hide_after_delay():
             await asyncio.sleep(0.2)
             self.suggestions_column.visible = False
-            self.page.update()
+            self.updates.request()
         
         self.page.run_task(hide_after_delay)
     
     def show_suggestions(self, cities: list):
-        """Display suggestions."""
-        colors = self.get_theme_colors()
+        """Display suggestions (history entries or catalogue cities)."""
         suggestions_list = ft.Column(spacing=0)
+        bgcolor = themes.card_bg(self.current_theme)
         
         for city in cities:
+            if isinstance(city, str):
+                icon, label, query = ft.Icons.HISTORY, city, city
+            else:
+                icon, label, query = ft.Icons.LOCATION_CITY, city.display_name, city.query
             suggestion_btn = ft.Container(
                 content=ft.Row(
                     [
-                        ft.Icon(ft.Icons.HISTORY, size=16, color=colors["text_secondary"]),
-                        ft.Text(city, color=colors["text_primary"], size=14),
+                        ft.Icon(icon, size=16, color=themes.TEXT_SECONDARY),
+                        ft.Text(label, color=themes.TEXT_PRIMARY, size=14),
                     ],
                     spacing=10,
                 ),
-                bgcolor=colors["card_bg"],
+                bgcolor=bgcolor,
                 padding=10,
-                on_click=lambda e, c=city: self.select_suggestion(c),
-                on_hover=lambda e: self.on_suggestion_hover(e),
-                border=ft.border.only(bottom=ft.BorderSide(1, colors["divider"])),
+                # Hover highlight comes from the theme's hover color
+                ink=True,
+                on_click=lambda e, c=query: self.select_suggestion(c),
+                border=themes.SUGGESTION_BORDER,
             )
             suggestions_list.controls.append(suggestion_btn)
         
         suggestion_container = ft.Container(
             content=suggestions_list,
-            bgcolor=colors["card_bg"],
-            border=ft.border.all(1, colors["input_border"]),
+            bgcolor=bgcolor,
+            border=themes.CARD_BORDER,
             border_radius=5,
         )
         
         self.suggestions_column.controls = [suggestion_container]
         self.suggestions_column.visible = True
-        self.page.update()
-    
-    def on_suggestion_hover(self, e):
-        """Handle hover."""
-        colors = self.get_theme_colors()
-        e.control.bgcolor = colors["suggestion_hover"] if e.data == "true" else colors["card_bg"]
-        self.page.update()
+        self.updates.request()
     
     def select_suggestion(self, city: str):
         """Select suggestion."""
         self.city_input.value = city
         self.suggestions_column.visible = False
-        self.page.update()
-        self.page.run_task(self.get_weather_and_forecast)
+        self.updates.request()
+        self.start_search(self.get_weather_and_forecast)
     
-    async def get_weather_and_forecast(self):
+    async def get_weather_and_forecast(self, generation: int):
         """Fetch both current weather and forecast."""
         city = self.city_input.value.strip()
         
@@ -401,317 +434,298 @@ class WeatherApp:
         self.weather_container.visible = False
         self.forecast_container.visible = False
         self.suggestions_column.visible = False
-        self.page.update()
+        self.updates.flush()
         
         try:
-            # Fetch both current weather and forecast
-            weather_data, forecast_data = await asyncio.gather(
+            await self.show_results(
+                generation,
                 self.weather_service.get_weather(city),
-                self.weather_service.get_forecast(city)
+                lambda: self.weather_service.get_forecast(city),
             )
+            if not self.is_current_search(generation):
+                return
             
             self.current_city = city
             self.add_to_history(city)
             
-            # Display both
-            await self.display_weather(weather_data)
-            await self.display_forecast(forecast_data)
-            
-            # Show tabs
-            self.tabs.visible = True
-            self.tabs.selected_index = 0
-            self.weather_container.visible = True
-            self.forecast_container.visible = False
-            
         except Exception as e:
-            self.show_error(str(e))
+            if self.is_current_search(generation):
+                self.show_error(str(e))
         
         finally:
-            self.loading.visible = False
-            self.page.update()
+            # A newer search owns the spinner now
+            if self.is_current_search(generation):
+                self.loading.visible = False
+                self.updates.flush()
     
-    async def get_location_weather(self):
+    async def get_location_weather(self, generation: int):
         """Get weather for current location."""
         self.loading.visible = True
         self.error_message.visible = False
         self.tabs.visible = False
         self.weather_container.visible = False
         self.forecast_container.visible = False
-        self.page.update()
+        self.updates.flush()
         
         try:
-            import httpx
+            # Cached IP lookup, then weather straight from coordinates
+            location = await self.weather_service.locate()
+            weather_data, forecast_data = await self.show_results(
+                generation,
+                self.weather_service.get_weather_by_coordinates(
+                    location.lat, location.lon
+                ),
+                lambda: self.weather_service.get_forecast_by_coordinates(
+                    location.lat, location.lon
+                ),
+            )
+            if not self.is_current_search(generation):
+                return
+            
+            place = weather_data or forecast_data
+            city = location.name or place.city_name
+            self.current_city = city
+            self.add_to_history(city)
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get("https://ipapi.co/json/")
-                data = response.json()
-                city = data.get('city', 'Unknown')
-                
-                weather_data, forecast_data = await asyncio.gather(
-                    self.weather_service.get_weather(city),
-                    self.weather_service.get_forecast(city)
-                )
-                
-                self.current_city = city
-                self.add_to_history(city)
-                
-                await self.display_weather(weather_data)
-                await self.display_forecast(forecast_data)
-                
-                self.tabs.visible = True
-                self.tabs.selected_index = 0
-                self.weather_container.visible = True
-                self.forecast_container.visible = False
-                
         except Exception as e:
-            self.show_error(f"Could not get your location: {str(e)}")
+            if self.is_current_search(generation):
+                self.show_error(f"Could not get your location: {str(e)}")
         
         finally:
-            self.loading.visible = False
-            self.page.update()
+            if self.is_current_search(generation):
+                self.loading.visible = False
+                self.updates.flush()
+    
+    async def show_results(self, generation: int, weather_request, forecast_request):
+        """
+        Render current weather as soon as it arrives.
+        
+        The forecast is fetched now or later, as the fetch policy decides.
+        When it is fetched up front and current weather fails, the
+        forecast is still shown, with the error in the Current tab.
+        
+        Args:
+            generation: Search generation (see start_search)
+            weather_request: Awaitable CurrentWeather
+            forecast_request: Callable returning an awaitable ForecastSeries
+        
+        Returns:
+            Tuple of (CurrentWeather, ForecastSeries). The forecast is only
+            returned when it stands in for failed current weather.
+        
+        Raises:
+            Exception: The current weather error, if there is nothing to show
+        """
+        self.forecast_request = forecast_request
+        self.forecast_task = None
+        self.forecast_loading.visible = False
+        self.forecast_body.visible = False
+        self.forecast_status.visible = False
+        if self.fetch_policy.start_search():
+            self.start_forecast(generation)
+        forecast_task = self.forecast_task
+        
+        try:
+            weather_data = await weather_request
+        except Exception as e:
+            if forecast_task is None:
+                raise
+            weather_error = e
+        else:
+            if self.is_current_search(generation):
+                # First content; the forecast tab fills in on its own
+                await self.display_weather(weather_data)
+                self.show_tabs(0)
+                self.loading.visible = False
+                self.updates.flush()
+            return weather_data, None
+        
+        # Current weather failed; fall back to the forecast
+        forecast_data = await asyncio.wrap_future(forecast_task)
+        if forecast_data is None:
+            raise weather_error
+        if self.is_current_search(generation):
+            self.set_panel_state(
+                self.weather_body, self.weather_status,
+                f"Current weather unavailable: {weather_error}",
+            )
+            self.show_tabs(1)
+            self.fetch_policy.on_view()
+        return None, forecast_data
+    
+    def start_forecast(self, generation: int):
+        """Fetch the shown search's forecast in the background."""
+        if not self.is_current_search(generation) or self.forecast_request is None:
+            return
+        self.fetch_policy.on_fetch()
+        self.forecast_loading.visible = True
+        self.forecast_body.visible = False
+        self.forecast_status.visible = False
+        self.forecast_task = self.page.run_task(
+            self.load_forecast, generation, self.forecast_request
+        )
+    
+    async def load_forecast(self, generation: int, forecast_request):
+        """
+        Fetch and render a forecast; errors are shown in the forecast tab.
+        
+        Returns:
+            The ForecastSeries, or None if the request failed
+        """
+        try:
+            forecast_data = await forecast_request()
+        except Exception as e:
+            if self.is_current_search(generation):
+                self.forecast_loading.visible = False
+                self.set_panel_state(
+                    self.forecast_body, self.forecast_status,
+                    f"Forecast unavailable: {e}",
+                )
+                self.updates.flush()
+            return None
+        
+        if self.is_current_search(generation):
+            await self.display_forecast(forecast_data)
+            self.updates.flush()
+        return forecast_data
+    
+    def show_tabs(self, index: int):
+        """Show the results tabs with one of them selected."""
+        self.error_message.visible = False
+        self.tabs.visible = True
+        self.tabs.selected_index = index
+        self.weather_container.visible = index == 0
+        self.forecast_container.visible = index == 1
+    
+    def restore_session(self):
+        """Restore history and the last viewed city from the disk cache."""
+        last_city, history = self.weather_service.load_session()
+        self.search_history = history[:10]
+        
+        if last_city:
+            # Served from the persistent cache when still fresh enough
+            self.city_input.value = last_city
+            self.start_search(self.get_weather_and_forecast)
     
     def add_to_history(self, city: str):
         """Add city to history."""
         if city not in self.search_history:
             self.search_history.insert(0, city)
             self.search_history = self.search_history[:10]
+        self.weather_service.save_session(city, self.search_history)
+        self.weather_service.save_usage(dict(self.fetch_policy.usage))
+        self.refresh_scheduler.set_recent(self.search_history)
     
-    async def display_weather(self, data: dict):
-        """Display current weather."""
-        colors = self.get_theme_colors()
-        
-        city_name = data.get("name", "Unknown")
-        country = data.get("sys", {}).get("country", "")
-        temp = data.get("main", {}).get("temp", 0)
-        feels_like = data.get("main", {}).get("feels_like", 0)
-        humidity = data.get("main", {}).get("humidity", 0)
-        pressure = data.get("main", {}).get("pressure", 0)
-        cloudiness = data.get("clouds", {}).get("all", 0)
-        description = data.get("weather", [{}])[0].get("description", "").title()
-        icon_code = data.get("weather", [{}])[0].get("icon", "01d")
-        wind_speed = data.get("wind", {}).get("speed", 0)
-        
-        # Store references to text elements for theme updates
+    def build_weather_view(self) -> ft.Container:
+        """Build the current weather panel once; searches fill in its values."""
         self.weather_city_text = ft.Text(
-            f"{city_name}, {country}",
             size=24,
             weight=ft.FontWeight.BOLD,
-            color=colors["text_primary"],
+            color=themes.TEXT_PRIMARY,
         )
         
+        self.weather_icon = ft.Image(width=100, height=100)
+        
         self.weather_desc_text = ft.Text(
-            description, 
-            size=20, 
-            italic=True, 
-            color=colors["text_secondary"]
+            size=20,
+            italic=True,
+            color=themes.TEXT_SECONDARY,
         )
         
         self.weather_temp_text = ft.Text(
-            f"{temp:.1f}°C",
             size=48,
             weight=ft.FontWeight.BOLD,
-            color=colors["temp_color"],
+            color=themes.TEMP_COLOR,
         )
         
-        self.weather_feels_text = ft.Text(
-            f"Feels like {feels_like:.1f}°C", 
-            size=16, 
-            color=colors["text_secondary"]
-        )
+        self.weather_feels_text = ft.Text(size=16, color=themes.TEXT_SECONDARY)
         
-        self.weather_divider = ft.Divider(color=colors["divider"])
+        # Info cards, with their value texts kept for updates
+        humidity_card, self.humidity_text = self.create_info_card(ft.Icons.WATER_DROP, "Humidity")
+        wind_card, self.wind_text = self.create_info_card(ft.Icons.AIR, "Wind")
+        pressure_card, self.pressure_text = self.create_info_card(ft.Icons.COMPRESS, "Pressure")
+        clouds_card, self.clouds_text = self.create_info_card(ft.Icons.CLOUD, "Clouds")
         
-        # Create info cards and store references
-        self.weather_info_cards = [
-            self.create_info_card(ft.Icons.WATER_DROP, "Humidity", f"{humidity}%", colors),
-            self.create_info_card(ft.Icons.AIR, "Wind", f"{wind_speed} m/s", colors),
-            self.create_info_card(ft.Icons.COMPRESS, "Pressure", f"{pressure}hPa", colors),
-            self.create_info_card(ft.Icons.CLOUD, "Clouds", f"{cloudiness}%", colors),
-        ]
+        # Shown instead of the data when only the forecast could be loaded
+        self.weather_status = ft.Text(color=themes.ERROR_COLOR, visible=False)
         
-        self.weather_container.content = ft.Container(
-            content=ft.Column(
-                [
-                    self.weather_city_text,
-                    ft.Row(
+        self.weather_body = ft.Column(
+            [
+                self.weather_city_text,
+                ft.Row(
+                    [self.weather_icon, self.weather_desc_text],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                ),
+                self.weather_temp_text,
+                self.weather_feels_text,
+                ft.Divider(color=themes.DIVIDER),
+                ft.Container(
+                    content=ft.Column(
                         [
-                            ft.Image(
-                                src=f"https://openweathermap.org/img/wn/{icon_code}@2x.png",
-                                width=100,
-                                height=100,
+                            ft.Row(
+                                [humidity_card, wind_card],
+                                alignment=ft.MainAxisAlignment.CENTER,
+                                spacing=15,
+                            ),
+                            ft.Row(
+                                [pressure_card, clouds_card],
+                                alignment=ft.MainAxisAlignment.CENTER,
+                                spacing=15,
                             ),
-                            self.weather_desc_text,
                         ],
-                        alignment=ft.MainAxisAlignment.CENTER,
-                    ),
-                    self.weather_temp_text,
-                    self.weather_feels_text,
-                    self.weather_divider,
-                    ft.Container(
-                        content=ft.Column(
-                            [
-                                ft.Row(
-                                    [self.weather_info_cards[0], self.weather_info_cards[1]],
-                                    alignment=ft.MainAxisAlignment.CENTER,
-                                    spacing=15,
-                                ),
-                                ft.Row(
-                                    [self.weather_info_cards[2], self.weather_info_cards[3]],
-                                    alignment=ft.MainAxisAlignment.CENTER,
-                                    spacing=15,
-                                ),
-                            ],
-                            spacing=15,
-                        ),
-                        width=350,
+                        spacing=15,
                     ),
-                ],
+                    width=350,
+                ),
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=10,
+        )
+        
+        return ft.Container(
+            content=ft.Column(
+                [self.weather_status, self.weather_body],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                spacing=10,
             ),
-            bgcolor=colors["container_bg"],
+            bgcolor=themes.CONTAINER_BG,
             border_radius=15,
             padding=20,
-            border=ft.border.all(2, colors["input_border"]),
+            border=themes.PANEL_BORDER,
         )
-        
-        self.page.update()
-    
-    def update_weather_colors(self):
-        """Update weather display colors dynamically."""
-        colors = self.get_theme_colors()
-        
-        # Update container
-        if self.weather_container.content:
-            self.weather_container.content.bgcolor = colors["container_bg"]
-            self.weather_container.content.border = ft.border.all(2, colors["input_border"])
-        
-        # Update text colors
-        if hasattr(self, 'weather_city_text'):
-            self.weather_city_text.color = colors["text_primary"]
-        if hasattr(self, 'weather_desc_text'):
-            self.weather_desc_text.color = colors["text_secondary"]
-        if hasattr(self, 'weather_temp_text'):
-            self.weather_temp_text.color = colors["temp_color"]
-        if hasattr(self, 'weather_feels_text'):
-            self.weather_feels_text.color = colors["text_secondary"]
-        if hasattr(self, 'weather_divider'):
-            self.weather_divider.color = colors["divider"]
-        
-        # Update info cards
-        if hasattr(self, 'weather_info_cards'):
-            for card in self.weather_info_cards:
-                card.bgcolor = colors["card_bg"]
-                card.border = ft.border.all(1, colors["input_border"])
-                # Update card content colors
-                if card.content and isinstance(card.content, ft.Column):
-                    for item in card.content.controls:
-                        if isinstance(item, ft.Icon):
-                            item.color = colors["icon_color"]
-                        elif isinstance(item, ft.Text):
-                            if item.size == 12:
-                                item.color = colors["text_secondary"]
-                            elif item.size == 16:
-                                item.color = colors["text_primary"]
-    
-    async def display_forecast(self, data: dict):
-        """Display 5-day forecast."""
-        colors = self.get_theme_colors()
-        
-        # Process forecast data - group by date
-        forecast_list = data.get("list", [])
-        daily_forecasts = {}
-        
-        for item in forecast_list:
-            dt = datetime.fromtimestamp(item["dt"])
-            date_key = dt.strftime("%Y-%m-%d")
-            
-            if date_key not in daily_forecasts:
-                daily_forecasts[date_key] = {
-                    "temps": [],
-                    "conditions": [],
-                    "icons": [],
-                    "date": dt,
-                }
-            
-            daily_forecasts[date_key]["temps"].append(item["main"]["temp"])
-            daily_forecasts[date_key]["conditions"].append(
-                item["weather"][0]["description"]
-            )
-            daily_forecasts[date_key]["icons"].append(
-                item["weather"][0]["icon"]
-            )
-        
-        # Get first 5 days
-        sorted_dates = sorted(daily_forecasts.keys())[:5]
-        forecast_cards = []
-        
-        # Store forecast cards for theme updates
-        self.forecast_cards_list = []
-        
-        for date_key in sorted_dates:
-            day_data = daily_forecasts[date_key]
-            high_temp = max(day_data["temps"])
-            low_temp = min(day_data["temps"])
-            
-            # Most common condition
-            condition = max(set(day_data["conditions"]), key=day_data["conditions"].count).title()
-            
-            # Most common icon
-            icon = max(set(day_data["icons"]), key=day_data["icons"].count)
-            
-            # Format date
-            day_name = day_data["date"].strftime("%A")
-            date_str = day_data["date"].strftime("%b %d")
-            
-            # Create text elements with references
-            day_name_text = ft.Text(
-                day_name,
-                size=16,
-                weight=ft.FontWeight.BOLD,
-                color=colors["text_primary"],
-            )
-            
-            date_str_text = ft.Text(
-                date_str,
-                size=12,
-                color=colors["text_secondary"],
-            )
-            
-            condition_text = ft.Text(
-                condition,
-                size=12,
-                color=colors["text_secondary"],
-                text_align=ft.TextAlign.CENTER,
-            )
-            
-            high_temp_text = ft.Text(
-                f"↑{high_temp:.0f}°",
-                size=14,
-                weight=ft.FontWeight.BOLD,
-                color=colors["temp_color"],
-            )
-            
-            low_temp_text = ft.Text(
-                f"↓{low_temp:.0f}°",
-                size=14,
-                color=colors["text_secondary"],
-            )
-            
-            # Create forecast card
-            card = ft.Container(
+    
+    def build_forecast_view(self) -> ft.Container:
+        """Build the forecast panel once, with a fixed pool of day cards."""
+        self.forecast_cards = []
+        for _ in range(FORECAST_DAYS):
+            card = {
+                'day_name': ft.Text(
+                    size=16,
+                    weight=ft.FontWeight.BOLD,
+                    color=themes.TEXT_PRIMARY,
+                ),
+                'date_str': ft.Text(size=12, color=themes.TEXT_SECONDARY),
+                'icon': ft.Image(width=60, height=60),
+                'condition': ft.Text(
+                    size=12,
+                    color=themes.TEXT_SECONDARY,
+                    text_align=ft.TextAlign.CENTER,
+                ),
+                'high_temp': ft.Text(
+                    size=14,
+                    weight=ft.FontWeight.BOLD,
+                    color=themes.TEMP_COLOR,
+                ),
+                'low_temp': ft.Text(size=14, color=themes.TEXT_SECONDARY),
+            }
+            card['container'] = ft.Container(
                 content=ft.Column(
                     [
-                        day_name_text,
-                        date_str_text,
-                        ft.Image(
-                            src=f"https://openweathermap.org/img/wn/{icon}.png",
-                            width=60,
-                            height=60,
-                        ),
-                        condition_text,
+                        card['day_name'],
+                        card['date_str'],
+                        card['icon'],
+                        card['condition'],
                         ft.Row(
-                            [high_temp_text, low_temp_text],
+                            [card['high_temp'], card['low_temp']],
                             alignment=ft.MainAxisAlignment.CENTER,
                             spacing=10,
                         ),
@@ -719,123 +733,146 @@ class WeatherApp:
                     horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                     spacing=5,
                 ),
-                bgcolor=colors["card_bg"],
                 border_radius=10,
                 padding=15,
                 width=140,
-                border=ft.border.all(1, colors["input_border"]),
+                border=themes.CARD_BORDER,
             )
-            
-            # Store references for theme updates
-            self.forecast_cards_list.append({
-                'container': card,
-                'day_name': day_name_text,
-                'date_str': date_str_text,
-                'condition': condition_text,
-                'high_temp': high_temp_text,
-                'low_temp': low_temp_text,
-            })
-            
-            forecast_cards.append(card)
+            self.cards.append(card['container'])
+            self.forecast_cards.append(card)
         
-        # Create title text with reference
-        self.forecast_title_text = ft.Text(
-            "5-Day Weather Forecast",
-            size=20,
-            weight=ft.FontWeight.BOLD,
-            color=colors["text_primary"],
+        # Forecast cards in a wrapping row
+        self.forecast_body = ft.Row(
+            [card['container'] for card in self.forecast_cards],
+            alignment=ft.MainAxisAlignment.CENTER,
+            wrap=True,
+            spacing=10,
+            run_spacing=10,
         )
         
-        self.forecast_divider = ft.Divider(color=colors["divider"])
+        # Shown while the forecast is still loading, or if it failed
+        self.forecast_loading = ft.ProgressRing(visible=False, color=themes.ICON_COLOR)
+        self.forecast_status = ft.Text(color=themes.ERROR_COLOR, visible=False)
         
-        # Display forecast cards in a scrollable row
-        self.forecast_container.content = ft.Container(
+        return ft.Container(
             content=ft.Column(
                 [
-                    self.forecast_title_text,
-                    self.forecast_divider,
-                    ft.Row(
-                        forecast_cards,
-                        alignment=ft.MainAxisAlignment.CENTER,
-                        wrap=True,
-                        spacing=10,
-                        run_spacing=10,
+                    ft.Text(
+                        "5-Day Weather Forecast",
+                        size=20,
+                        weight=ft.FontWeight.BOLD,
+                        color=themes.TEXT_PRIMARY,
                     ),
+                    ft.Divider(color=themes.DIVIDER),
+                    self.forecast_loading,
+                    self.forecast_status,
+                    self.forecast_body,
                 ],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 spacing=15,
             ),
-            bgcolor=colors["container_bg"],
+            bgcolor=themes.CONTAINER_BG,
             border_radius=15,
             padding=20,
-            border=ft.border.all(2, colors["input_border"]),
+            border=themes.PANEL_BORDER,
         )
+    
+    async def display_weather(self, weather: CurrentWeather):
+        """Display current weather."""
+        # Only changed values are sent to the client
+        self.weather_city_text.value = f"{weather.city_name}, {weather.country}"
+        self.weather_icon.src = f"https://openweathermap.org/img/wn/{weather.icon}@2x.png"
+        self.weather_desc_text.value = weather.description.title()
+        self.weather_temp_text.value = f"{weather.temp:.1f}°C"
+        self.weather_feels_text.value = f"Feels like {weather.feels_like:.1f}°C"
+        
+        self.humidity_text.value = f"{weather.humidity}%"
+        self.wind_text.value = f"{weather.wind_speed} m/s"
+        self.pressure_text.value = f"{weather.pressure}hPa"
+        self.clouds_text.value = f"{weather.cloudiness}%"
+        
+        self.set_panel_state(self.weather_body, self.weather_status)
+        self.updates.request()
+    
+    async def display_forecast(self, forecast: ForecastSeries):
+        """Display 5-day forecast."""
+        # NumPy is only needed once a forecast is shown
+        from forecast_aggregation import summarize_daily
         
-        self.page.update()
-    
-    def update_forecast_colors(self):
-        """Update forecast display colors dynamically."""
-        colors = self.get_theme_colors()
-        
-        # Update main container
-        if self.forecast_container.content:
-            self.forecast_container.content.bgcolor = colors["container_bg"]
-            self.forecast_container.content.border = ft.border.all(2, colors["input_border"])
-        
-        # Update title and divider
-        if hasattr(self, 'forecast_title_text'):
-            self.forecast_title_text.color = colors["text_primary"]
-        if hasattr(self, 'forecast_divider'):
-            self.forecast_divider.color = colors["divider"]
-        
-        # Update all forecast cards
-        if hasattr(self, 'forecast_cards_list'):
-            for card_refs in self.forecast_cards_list:
-                # Update container
-                card_refs['container'].bgcolor = colors["card_bg"]
-                card_refs['container'].border = ft.border.all(1, colors["input_border"])
-                
-                # Update text colors
-                card_refs['day_name'].color = colors["text_primary"]
-                card_refs['date_str'].color = colors["text_secondary"]
-                card_refs['condition'].color = colors["text_secondary"]
-                card_refs['high_temp'].color = colors["temp_color"]
-                card_refs['low_temp'].color = colors["text_secondary"]
-    
-    def create_info_card(self, icon, label, value, colors):
-        """Create info card."""
+        # Group 3-hour entries into local days (high/low/most common condition)
+        daily_summaries = summarize_daily(forecast, days=FORECAST_DAYS)
+        
+        for i, card in enumerate(self.forecast_cards):
+            if i >= len(daily_summaries):
+                # Fewer days than cards: hide the spare ones
+                card['container'].visible = False
+                continue
+            
+            day = daily_summaries[i]
+            card['day_name'].value = day.date.strftime("%A")
+            card['date_str'].value = day.date.strftime("%b %d")
+            card['icon'].src = f"https://openweathermap.org/img/wn/{day.icon}.png"
+            card['condition'].value = day.condition.title()
+            card['high_temp'].value = f"↑{day.high:.0f}°"
+            card['low_temp'].value = f"↓{day.low:.0f}°"
+            card['container'].visible = True
+        
+        self.forecast_loading.visible = False
+        self.set_panel_state(self.forecast_body, self.forecast_status)
+        self.updates.request()
+    
+    def set_panel_state(self, body: ft.Control, status: ft.Text, error: str = ""):
+        """Show a panel's data, or an error message in its place."""
+        body.visible = not error
+        status.value = error
+        status.visible = bool(error)
+    
+    def create_tab_label(self, icon, text, on_hover=None):
+        """Icon-over-text tab label that can report hover."""
         return ft.Container(
+            content=ft.Column(
+                [ft.Icon(icon), ft.Text(text)],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=4,
+                tight=True,
+            ),
+            padding=ft.padding.symmetric(vertical=8),
+            on_hover=on_hover,
+        )
+    
+    def create_info_card(self, icon, label):
+        """Create info card; returns the card and its value text."""
+        value_text = ft.Text(
+            size=16,
+            weight=ft.FontWeight.BOLD,
+            color=themes.TEXT_PRIMARY,
+        )
+        card = ft.Container(
             content=ft.Column(
                 [
-                    ft.Icon(icon, size=30, color=colors["icon_color"]),
-                    ft.Text(label, size=12, color=colors["text_secondary"]),
-                    ft.Text(
-                        value,
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=colors["text_primary"],
-                    ),
+                    ft.Icon(icon, size=30, color=themes.ICON_COLOR),
+                    ft.Text(label, size=12, color=themes.TEXT_SECONDARY),
+                    value_text,
                 ],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 spacing=5,
             ),
-            bgcolor=colors["card_bg"],
             border_radius=10,
             padding=15,
             width=150,
-            border=ft.border.all(1, colors["input_border"]),
+            border=themes.CARD_BORDER,
         )
+        self.cards.append(card)
+        return card, value_text
     
     def show_error(self, message: str):
         """Show error message."""
-        colors = self.get_theme_colors()
         self.error_message.value = f"❌ {message}"
-        self.error_message.color = colors["error_color"]
         self.error_message.visible = True
         self.weather_container.visible = False
         self.forecast_container.visible = False
         self.tabs.visible = False
-        self.page.update()
+        self.updates.request()
 
 
 def main(page: ft.Page):
@@ -0,0 +1,215 @@
+# metrics.py
+"""In-process metrics for WeatherService.
+
+Counters, gauges and latency histograms keyed by name and labels, plus
+collectors that read existing stats (cache, rate limiter, breaker) only
+when a snapshot is taken. Snapshots can be rendered as JSON or in the
+Prometheus text exposition format.
+
+When a Metrics instance is disabled, recording calls return immediately
+and callers skip their timing code, so instrumentation costs a single
+attribute check per call.
+"""
+
+import json
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, Mapping, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds, suited to HTTP calls against a remote API
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return lower  # +Inf bucket: best we can say
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "buckets": {
+                _format_bound(bound): count
+                for bound, count in zip(self.bounds + (math.inf,), self.counts)
+            },
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metrics:
+    """
+    Registry of counters, gauges, histograms and collectors.
+
+    Args:
+        enabled: Record counters, gauges and histograms
+        prefix: Prefix added to every exported metric name
+        buckets: Histogram bucket upper bounds in seconds
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        prefix: str = "weather_",
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._collectors: List[Tuple[str, Callable[[], Mapping[str, object]]]] = []
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1):
+        """Increment a counter."""
+        if not self.enabled:
+            return
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add(self, name: str, labels: Labels = (), delta: float = 1):
+        """Move a gauge up or down (e.g. requests in flight)."""
+        if not self.enabled:
+            return
+        key = (name, labels)
+        self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """Record a value (usually seconds) in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def register_collector(self, name: str,
+                           collect: Callable[[], Mapping[str, object]]):
+        """
+        Export a stats mapping that is read only when a snapshot is taken.
+
+        Collectors are exported even when recording is disabled, since
+        they cost nothing until read.
+
+        Args:
+            name: Group name, e.g. "cache"
+            collect: Callable returning a mapping of stat name to value
+        """
+        self._collectors.append((name, collect))
+
+    def reset(self):
+        """Drop recorded counters, gauges and histograms."""
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, object]:
+        """All metrics as plain data, suitable for JSON."""
+
+        def series(store: Dict, convert=lambda v: v) -> Dict[str, List[Dict]]:
+            grouped: Dict[str, List[Dict]] = {}
+            for (name, labels), value in sorted(store.items()):
+                grouped.setdefault(name, []).append(
+                    {"labels": dict(labels), "value": convert(value)}
+                )
+            return grouped
+
+        return {
+            "enabled": self.enabled,
+            "counters": series(self._counters),
+            "gauges": series(self._gauges),
+            "histograms": series(self._histograms, Histogram.to_dict),
+            **{name: dict(collect()) for name, collect in self._collectors},
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        """Render a snapshot as JSON."""
+        return json.dumps(self.snapshot(), indent=indent, default=str)
+
+    def to_prometheus(self) -> str:
+        """Render a snapshot in the Prometheus text exposition format."""
+        lines: List[str] = []
+        typed = set()
+        p = self.prefix
+
+        def emit_type(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self._counters.items()):
+            emit_type(p + name, "counter")
+            lines.append(f"{p}{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), value in sorted(self._gauges.items()):
+            emit_type(p + name, "gauge")
+            lines.append(f"{p}{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), histogram in sorted(
+                self._histograms.items(), key=lambda item: item[0]):
+            emit_type(p + name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + (math.inf,), histogram.counts):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_bound(bound)),)
+                lines.append(f"{p}{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{p}{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{p}{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for group, collect in self._collectors:
+            for stat, value in collect().items():
+                name = f"{p}{group}_{stat}"
+                emit_type(name, "gauge")
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    # Non-numeric stats (e.g. breaker state) become a label
+                    lines.append(f"{name}{_format_labels((('value', value),))} 1")
+                else:
+                    lines.append(f"{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
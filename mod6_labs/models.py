@@ -0,0 +1,223 @@
+# models.py
+"""Typed data models returned by the weather service.
+
+Models are frozen and slotted, and parse only the fields the app uses,
+so cached entries stay small. Each model can rebuild a minimal
+OpenWeather-shaped payload with ``to_api()``; ``from_api()`` reads both
+that and the full API response.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+# A batch query is either a city name or a (lat, lon) pair
+Query = Union[str, Tuple[float, float]]
+
+
+@dataclass(frozen=True)
+class Location:
+    """A city resolved to canonical coordinates."""
+
+    __slots__ = ("name", "country", "state", "lat", "lon")
+
+    name: str
+    country: str
+    state: str
+    lat: float
+    lon: float
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "Location":
+        """Build a location from one OpenWeather geocoding result."""
+        return cls(
+            name=data.get("name", ""),
+            country=data.get("country", ""),
+            state=data.get("state", ""),
+            lat=float(data["lat"]),
+            lon=float(data["lon"]),
+        )
+
+    def to_api(self) -> Dict:
+        """Geocoding-shaped payload for this location."""
+        return {
+            "name": self.name,
+            "country": self.country,
+            "state": self.state,
+            "lat": self.lat,
+            "lon": self.lon,
+        }
+
+    @property
+    def key(self) -> tuple:
+        """Canonical identity: coordinates rounded to ~100 m."""
+        return (round(self.lat, 3), round(self.lon, 3))
+
+    @property
+    def display_name(self) -> str:
+        """Human-readable name such as 'Naga, PH'."""
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+
+@dataclass(frozen=True)
+class CurrentWeather:
+    """Current conditions for one place."""
+
+    __slots__ = (
+        "city_id", "city_name", "country", "lat", "lon", "dt", "timezone",
+        "temp", "feels_like", "humidity", "pressure", "wind_speed",
+        "cloudiness", "description", "icon",
+    )
+
+    city_id: int
+    city_name: str
+    country: str
+    lat: float
+    lon: float
+    dt: int  # observation time, unix seconds
+    timezone: int  # offset from UTC in seconds
+    temp: float
+    feels_like: float
+    humidity: int
+    pressure: int
+    wind_speed: float
+    cloudiness: int
+    description: str
+    icon: str
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "CurrentWeather":
+        """Parse an OpenWeather /weather response."""
+        main = data.get("main", {})
+        coord = data.get("coord", {})
+        weather = (data.get("weather") or [{}])[0]
+        return cls(
+            city_id=data.get("id", 0),
+            city_name=data.get("name", "Unknown"),
+            country=data.get("sys", {}).get("country", ""),
+            lat=coord.get("lat", 0.0),
+            lon=coord.get("lon", 0.0),
+            dt=data.get("dt", 0),
+            timezone=data.get("timezone", 0),
+            temp=main.get("temp", 0),
+            feels_like=main.get("feels_like", 0),
+            humidity=main.get("humidity", 0),
+            pressure=main.get("pressure", 0),
+            wind_speed=data.get("wind", {}).get("speed", 0),
+            cloudiness=data.get("clouds", {}).get("all", 0),
+            description=weather.get("description", ""),
+            icon=weather.get("icon", "01d"),
+        )
+
+    def to_api(self) -> Dict:
+        """Minimal /weather-shaped payload holding the parsed fields."""
+        return {
+            "id": self.city_id,
+            "name": self.city_name,
+            "sys": {"country": self.country},
+            "coord": {"lat": self.lat, "lon": self.lon},
+            "dt": self.dt,
+            "timezone": self.timezone,
+            "main": {
+                "temp": self.temp,
+                "feels_like": self.feels_like,
+                "humidity": self.humidity,
+                "pressure": self.pressure,
+            },
+            "wind": {"speed": self.wind_speed},
+            "clouds": {"all": self.cloudiness},
+            "weather": [{"description": self.description, "icon": self.icon}],
+        }
+
+
+@dataclass(frozen=True)
+class ForecastSeries:
+    """
+    3-hourly forecast stored column-wise.
+
+    One tuple per field instead of 40 nested dicts keeps the series
+    compact and ready for vectorized aggregation.
+    """
+
+    __slots__ = (
+        "city_id", "city_name", "country", "timezone",
+        "times", "temps", "descriptions", "icons", "pops", "precipitation",
+    )
+
+    city_id: int
+    city_name: str
+    country: str
+    timezone: int  # offset from UTC in seconds
+    times: Tuple[int, ...]  # unix seconds
+    temps: Tuple[float, ...]
+    descriptions: Tuple[str, ...]
+    icons: Tuple[str, ...]
+    pops: Tuple[float, ...]  # probability of precipitation, 0-1
+    precipitation: Tuple[float, ...]  # rain + snow volume over 3h, mm
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "ForecastSeries":
+        """Parse an OpenWeather /forecast response."""
+        city = data.get("city", {})
+        items = data.get("list", [])
+        weathers = [(item.get("weather") or [{}])[0] for item in items]
+        return cls(
+            city_id=city.get("id", 0),
+            city_name=city.get("name", "Unknown"),
+            country=city.get("country", ""),
+            timezone=city.get("timezone", 0),
+            times=tuple(item["dt"] for item in items),
+            temps=tuple(item.get("main", {}).get("temp", 0) for item in items),
+            descriptions=tuple(w.get("description", "") for w in weathers),
+            icons=tuple(w.get("icon", "01d") for w in weathers),
+            pops=tuple(item.get("pop", 0) for item in items),
+            precipitation=tuple(
+                item.get("rain", {}).get("3h", 0) + item.get("snow", {}).get("3h", 0)
+                for item in items
+            ),
+        )
+
+    def to_api(self) -> Dict:
+        """Minimal /forecast-shaped payload holding the parsed fields."""
+        return {
+            "city": {
+                "id": self.city_id,
+                "name": self.city_name,
+                "country": self.country,
+                "timezone": self.timezone,
+            },
+            "cnt": len(self.times),
+            "list": [
+                {
+                    "dt": dt,
+                    "main": {"temp": temp},
+                    "weather": [{"description": description, "icon": icon}],
+                    "pop": pop,
+                    "rain": {"3h": precipitation},
+                }
+                for dt, temp, description, icon, pop, precipitation in zip(
+                    self.times, self.temps, self.descriptions, self.icons,
+                    self.pops, self.precipitation,
+                )
+            ],
+        }
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of one item in a bulk lookup."""
+
+    __slots__ = ("query", "data", "error", "elapsed", "index")
+
+    query: Query
+    data: Optional[Any]
+    error: Optional[Exception]
+    elapsed: float  # seconds
+    index: int  # position of the query in the batch input
+
+    @property
+    def ok(self) -> bool:
+        """Whether the lookup succeeded."""
+        return self.error is None
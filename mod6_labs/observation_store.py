@@ -0,0 +1,234 @@
+# observation_store.py
+"""Append-only store of fetched weather observations.
+
+Each city gets one file of fixed-size binary records (OBS_DTYPE, 20 bytes)
+in time order, plus a small JSON index with names and time ranges. Reads
+memory-map the file, so a range query only touches the pages it needs
+and downsampled trends over months of data stay cheap.
+
+The index is rewritten every ``flush_every`` appends and on ``flush()``
+or ``close()``, not per observation. After a crash, records written since
+the last index save are dropped and overwritten by the next appends.
+
+The store assumes a single writer process; appends from several threads
+are serialized.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from models import CurrentWeather
+
+# One observation; packed, little-endian
+OBS_DTYPE = np.dtype([
+    ("dt", "<i8"),  # unix seconds
+    ("temp", "<f4"),
+    ("humidity", "u1"),  # %
+    ("pressure", "<u2"),  # hPa
+    ("wind_speed", "<f4"),
+    ("cloudiness", "u1"),  # %
+])
+
+# Downsampled series: one row per time bucket
+TREND_DTYPE = np.dtype([
+    ("dt", "<i8"),  # bucket start
+    ("count", "<i4"),
+    ("temp", "<f4"),  # mean
+    ("temp_min", "<f4"),
+    ("temp_max", "<f4"),
+    ("humidity", "<f4"),
+    ("pressure", "<f4"),
+    ("wind_speed", "<f4"),
+    ("cloudiness", "<f4"),
+])
+
+_MEAN_FIELDS = ("humidity", "pressure", "wind_speed", "cloudiness")
+
+
+def series_key(weather: CurrentWeather) -> str:
+    """Store key for a place: the OpenWeather city id, else its coordinates."""
+    if weather.city_id:
+        return str(weather.city_id)
+    return f"{weather.lat:.2f}_{weather.lon:.2f}"
+
+
+class ObservationStore:
+    """
+    Columnar history of current-weather observations, one file per city.
+
+    Args:
+        root: Directory holding the data files and index
+        flush_every: Appends between index saves
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, root: str, flush_every: int = 32):
+        self.root = root
+        self.flush_every = max(1, flush_every)
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, self.INDEX_FILE)
+        self._lock = threading.Lock()
+        self._unsaved = 0  # appends not yet in the saved index
+        self.index: Dict[str, Dict] = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.obs")
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, separators=(",", ":"))
+        os.replace(tmp_path, self._index_path)
+        self._unsaved = 0
+
+    def flush(self):
+        """Save the index if observations were appended since the last save."""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def close(self):
+        """Save pending index changes."""
+        self.flush()
+
+    def append(self, weather: CurrentWeather) -> bool:
+        """
+        Record an observation.
+
+        Observations that are not newer than the last stored one for the
+        city (repeat reads of the same report) are skipped.
+
+        Blocking file I/O; async callers should run it in a thread.
+
+        Returns:
+            Whether a record was written
+        """
+        with self._lock:
+            return self._append(weather)
+
+    def _append(self, weather: CurrentWeather) -> bool:
+        key = series_key(weather)
+        entry = self.index.get(key)
+        if entry is not None and weather.dt <= entry["last"]:
+            return False
+
+        record = np.zeros(1, dtype=OBS_DTYPE)
+        record[0] = (
+            weather.dt,
+            weather.temp,
+            min(max(int(weather.humidity), 0), 255),
+            min(max(int(weather.pressure), 0), 65535),
+            weather.wind_speed,
+            min(max(int(weather.cloudiness), 0), 255),
+        )
+        # Write right after the last indexed record, dropping any record
+        # left over from a write whose index update never happened
+        path = self._path(key)
+        offset = (entry["count"] if entry else 0) * OBS_DTYPE.itemsize
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(record.tobytes())
+            if os.fstat(f.fileno()).st_size > f.tell():
+                f.truncate()
+
+        if entry is None:
+            entry = self.index[key] = {
+                "name": weather.city_name,
+                "country": weather.country,
+                "first": weather.dt,
+                "count": 0,
+            }
+        entry["last"] = weather.dt
+        entry["count"] += 1
+        self._unsaved += 1
+        if self._unsaved >= self.flush_every:
+            self._save_index()
+        return True
+
+    def series(self, key: str) -> np.ndarray:
+        """All observations for a city as a read-only memory map."""
+        if key not in self.index:
+            return np.empty(0, dtype=OBS_DTYPE)
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            # Indexed but missing (removed by hand, or lost in a crash)
+            return np.empty(0, dtype=OBS_DTYPE)
+        # Size the map from the index so a torn last record is ignored,
+        # but never past the end of a file that came up short
+        count = min(self.index[key]["count"], size // OBS_DTYPE.itemsize)
+        if not count:
+            return np.empty(0, dtype=OBS_DTYPE)
+        return np.memmap(path, dtype=OBS_DTYPE, mode="r", shape=(count,))
+
+    def range(self, key: str, start: Optional[int] = None,
+              end: Optional[int] = None) -> np.ndarray:
+        """
+        Observations with start <= dt < end.
+
+        Args:
+            key: City key (see series_key)
+            start: First unix time to include (default: from the start)
+            end: Unix time to stop before (default: up to the latest)
+
+        Returns:
+            Structured array of OBS_DTYPE (a copy of just the range)
+        """
+        data = self.series(key)
+        times = data["dt"]
+        lo = 0 if start is None else int(np.searchsorted(times, start, "left"))
+        hi = len(data) if end is None else int(np.searchsorted(times, end, "left"))
+        return np.array(data[lo:hi])
+
+    def trend(self, key: str, start: Optional[int] = None,
+              end: Optional[int] = None, bucket: Optional[int] = None,
+              max_points: int = 200) -> np.ndarray:
+        """
+        Downsample a range into fixed-width time buckets for charts.
+
+        Args:
+            key: City key (see series_key)
+            start: First unix time to include
+            end: Unix time to stop before
+            bucket: Bucket width in seconds; by default the range is split
+                into at most ``max_points`` buckets
+            max_points: Target number of points when ``bucket`` is None
+
+        Returns:
+            Structured array of TREND_DTYPE, one row per non-empty bucket
+        """
+        data = self.range(key, start, end)
+        if len(data) == 0:
+            return np.empty(0, dtype=TREND_DTYPE)
+
+        times = data["dt"]
+        origin = int(times[0]) if start is None else start
+        if bucket is None:
+            span = int(times[-1]) - origin + 1
+            bucket = max(1, -(-span // max(1, max_points)))
+
+        # Times are sorted, so each bucket is one contiguous run
+        ids = (times - origin) // bucket
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        counts = np.diff(np.r_[starts, len(data)])
+
+        out = np.empty(len(starts), dtype=TREND_DTYPE)
+        out["dt"] = origin + ids[starts] * bucket
+        out["count"] = counts
+        temps = data["temp"].astype(np.float64)
+        out["temp"] = np.add.reduceat(temps, starts) / counts
+        out["temp_min"] = np.minimum.reduceat(temps, starts)
+        out["temp_max"] = np.maximum.reduceat(temps, starts)
+        for field in _MEAN_FIELDS:
+            values = data[field].astype(np.float64)
+            out[field] = np.add.reduceat(values, starts) / counts
+        return out
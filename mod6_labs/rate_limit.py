@@ -0,0 +1,161 @@
+# rate_limit.py
+"""Client-side rate limiting and quota accounting for the API key."""
+
+import asyncio
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+
+class TokenBucket:
+    """Token bucket allowing ``capacity`` calls per ``period`` seconds."""
+
+    __slots__ = ("capacity", "period", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period  # tokens per second
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def time_until_available(self, now: float) -> float:
+        """Seconds until one token is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        """Consume one token (call only when one is available)."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """
+    Per-minute and per-day budgets for upstream calls.
+
+    ``acquire()`` waits for a token, or gives up once the wait would
+    exceed ``max_wait`` so callers can fall back to cached data. HTTP 429
+    responses pause all calls via ``backoff()``; the pause honours
+    ``Retry-After`` and otherwise doubles with each consecutive 429.
+    """
+
+    MIN_BACKOFF = 1.0  # seconds
+    MAX_BACKOFF = 60.0  # seconds
+
+    def __init__(self, per_minute: int = 0, per_day: int = 0):
+        self.per_minute = per_minute
+        self.per_day = per_day
+
+        self._buckets: List[TokenBucket] = []
+        if per_minute > 0:
+            self._buckets.append(TokenBucket(per_minute, 60))
+        if per_day > 0:
+            self._buckets.append(TokenBucket(per_day, 24 * 3600))
+
+        self._paused_until = 0.0
+        self._penalty = 0.0
+
+        # Quota accounting
+        self.total_calls = 0
+        self.calls_today = 0
+        self._today = date.today()
+        self.throttled = 0  # 429 responses received
+        self.rejected = 0  # calls given up locally
+        self.waited = 0.0  # seconds spent queued
+
+    def wait_time(self) -> float:
+        """Seconds until the next call is allowed."""
+        now = time.monotonic()
+        wait = max(0.0, self._paused_until - now)
+        for bucket in self._buckets:
+            wait = max(wait, bucket.time_until_available(now))
+        return wait
+
+    def has_capacity(self) -> bool:
+        """Whether a call could be made right now without waiting."""
+        return self.wait_time() <= 0
+
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Wait for permission to make one upstream call.
+
+        Args:
+            max_wait: Give up instead of waiting longer than this (seconds)
+
+        Returns:
+            True if the call may proceed, False if the budget is exhausted
+        """
+        waited = 0.0
+        while True:
+            wait = self.wait_time()
+            if wait <= 0:
+                now = time.monotonic()
+                for bucket in self._buckets:
+                    bucket.take(now)
+                self._count_call()
+                self.waited += waited
+                return True
+
+            if max_wait is not None and waited + wait > max_wait:
+                self.rejected += 1
+                self.waited += waited
+                return False
+
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _count_call(self):
+        today = date.today()
+        if today != self._today:
+            self._today = today
+            self.calls_today = 0
+        self.total_calls += 1
+        self.calls_today += 1
+
+    def backoff(self, retry_after: Optional[float] = None):
+        """
+        Pause all calls after the upstream throttled us (HTTP 429).
+
+        Args:
+            retry_after: Server-provided delay in seconds, if any
+        """
+        self.throttled += 1
+        if retry_after is not None and retry_after >= 0:
+            delay = retry_after
+        else:
+            delay = min(
+                self.MAX_BACKOFF, max(self.MIN_BACKOFF, self._penalty * 2)
+            )
+        self._penalty = delay
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def record_success(self):
+        """Reset the adaptive backoff after a successful call."""
+        self._penalty = 0.0
+
+    @property
+    def quota(self) -> Dict[str, float]:
+        """Usage counters and remaining budget."""
+        now = time.monotonic()
+        stats = {
+            "total_calls": self.total_calls,
+            "calls_today": self.calls_today,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "waited_seconds": round(self.waited, 3),
+            "paused_for": round(max(0.0, self._paused_until - now), 3),
+        }
+        for bucket in self._buckets:
+            bucket._refill(now)
+            label = "minute" if bucket.period == 60 else "day"
+            stats[f"remaining_per_{label}"] = int(bucket.tokens)
+        return stats
@@ -0,0 +1,186 @@
+# refresh_scheduler.py
+"""Background refresh that keeps watched cities' cache entries warm."""
+
+import asyncio
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from resilience import OPEN
+from weather_service import WeatherService, WeatherServiceError
+
+
+class RefreshScheduler:
+    """
+    Periodically refresh pinned and recently searched cities.
+
+    Each city is checked on its own jittered schedule, so refreshes do not
+    line up into bursts, and an entry is refetched only when it is about
+    to expire. Refreshes are skipped while the rate budget is exhausted
+    or the circuit breaker is open, and the whole loop can be paused while
+    the window is hidden.
+    """
+
+    def __init__(
+        self,
+        service: WeatherService,
+        interval: Optional[float] = None,
+        lead_time: Optional[float] = None,
+        jitter: Optional[float] = None,
+        max_recent: Optional[int] = None,
+        fetch_forecasts: bool = True,
+        on_forecast_refresh: Optional[Callable[[], None]] = None,
+    ):
+        self.service = service
+        self.interval = interval if interval is not None else Config.REFRESH_INTERVAL
+        self.lead_time = lead_time if lead_time is not None else Config.REFRESH_LEAD_TIME
+        self.jitter = jitter if jitter is not None else Config.REFRESH_JITTER
+        self.max_recent = max_recent if max_recent is not None else Config.REFRESH_RECENT_CITIES
+
+        self.pinned: List[str] = [
+            city.strip() for city in Config.PINNED_CITIES.split(",") if city.strip()
+        ]
+        self.recent: List[str] = []
+        # Whether to fetch forecasts that are not cached yet; when False
+        # only forecasts the user already loaded are kept warm
+        self.fetch_forecasts = fetch_forecasts
+        self.on_forecast_refresh = on_forecast_refresh
+        self._next_check: Dict[str, float] = {}
+
+        self._running = asyncio.Event()
+        self._running.set()
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.refreshes = 0
+        self.forecast_refreshes = 0
+        self.skipped = 0
+        self.failures = 0
+
+    @property
+    def watched(self) -> List[str]:
+        """Pinned cities followed by the most recent searches, deduplicated."""
+        seen = set()
+        cities = []
+        for city in self.pinned + self.recent[:self.max_recent]:
+            key = city.lower()
+            if key not in seen:
+                seen.add(key)
+                cities.append(city)
+        return cities
+
+    def pin(self, city: str):
+        """Always keep a city warm."""
+        if city not in self.pinned:
+            self.pinned.append(city)
+
+    def unpin(self, city: str):
+        """Stop keeping a pinned city warm."""
+        if city in self.pinned:
+            self.pinned.remove(city)
+
+    def set_recent(self, cities: Iterable[str]):
+        """Replace the recent-search list (most recent first)."""
+        self.recent = list(cities)
+
+    def pause(self):
+        """
+        Stop refreshing, e.g. while the window is hidden.
+
+        Like resume(), call this from the event loop running run().
+        """
+        self._running.clear()
+
+    def resume(self):
+        """Resume refreshing."""
+        self._running.set()
+
+    @property
+    def is_paused(self) -> bool:
+        return not self._running.is_set()
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self) -> asyncio.Task:
+        """Start the refresh loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop the refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """Refresh loop; runs until cancelled."""
+        while True:
+            await self._running.wait()
+            await self.refresh_due()
+
+            # Wake up for the next due city, but at least every interval
+            now = time.monotonic()
+            upcoming = [t for t in self._next_check.values() if t > now]
+            delay = min(upcoming, default=now + self.interval) - now
+            await asyncio.sleep(max(1.0, min(delay, self.interval)))
+
+    async def refresh_due(self):
+        """Refresh every watched city whose check time has come."""
+        now = time.monotonic()
+        watched = self.watched
+
+        # Forget cities that are no longer watched
+        for city in list(self._next_check):
+            if city not in watched:
+                del self._next_check[city]
+
+        for city in watched:
+            if not self._running.is_set():
+                return
+
+            if city not in self._next_check:
+                # Stagger newly watched cities across the first interval
+                self._next_check[city] = now + random.uniform(0, self.interval)
+                continue
+            if self._next_check[city] > now:
+                continue
+
+            self._next_check[city] = now + self._jittered(self.interval)
+
+            if (not self.service.rate_limiter.has_capacity()
+                    or self.service.circuit_breaker.state == OPEN):
+                self.skipped += 1
+                continue
+
+            try:
+                refreshed = await self.service.prefetch(
+                    city, self.lead_time, forecast=self.fetch_forecasts
+                )
+            except (WeatherServiceError, ValueError):
+                self.failures += 1
+                continue
+
+            self.refreshes += len(refreshed)
+            if "forecast" in refreshed:
+                self.forecast_refreshes += 1
+                if self.on_forecast_refresh is not None:
+                    self.on_forecast_refresh()
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Scheduler counters."""
+        return {
+            "watched": len(self.watched),
+            "paused": self.is_paused,
+            "refreshes": self.refreshes,
+            "forecast_refreshes": self.forecast_refreshes,
+            "skipped": self.skipped,
+            "failures": self.failures,
+        }
@@ -0,0 +1,93 @@
+# resilience.py
+"""Retry backoff and circuit breaker for upstream calls."""
+
+import random
+import time
+from typing import Dict
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Retry number, starting at 1
+        base: Delay for the first retry (seconds)
+        cap: Maximum delay (seconds)
+
+    Returns:
+        Random delay between 0 and min(cap, base * 2 ** (attempt - 1))
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the upstream is unhealthy.
+
+    After ``failure_threshold`` consecutive failed requests the breaker
+    opens and rejects calls for ``reset_timeout`` seconds. It then lets a
+    single probe through (half-open): success closes the breaker, failure
+    opens it again. Callers that retry report a request once, after its
+    last attempt.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream right now."""
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+        # Half-open: allow exactly one probe
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def release_probe(self):
+        """Give up a half-open probe slot without reporting an outcome."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        """The upstream answered normally."""
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """The upstream timed out, was unreachable or returned a 5xx."""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Current state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+        }
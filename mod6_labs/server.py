@@ -0,0 +1,187 @@
+# server.py
+"""Shared weather API for a site.
+
+Runs one WeatherService behind an OpenWeather-compatible HTTP API, so
+every desktop client on the network shares a single cache, in-flight
+request coalescing and rate budget. A building full of clients then
+costs one upstream call per city per TTL.
+
+Endpoints (same query parameters as OpenWeather):
+    /data/2.5/weather   (alias /weather)    current weather by q or lat/lon
+    /data/2.5/forecast  (alias /forecast)   5-day forecast by q or lat/lon
+    /geo/1.0/direct                          geocoding by q
+    /metrics                                 Prometheus text (?format=json)
+    /health                                  liveness and breaker state
+
+Run it with the real API key in its environment:
+    python server.py --port 8086
+
+and point each client at it:
+    OPENWEATHER_BASE_URL=http://<server>:8086/data/2.5/weather
+    OPENWEATHER_API_KEY=<WEATHER_SERVER_CLIENT_KEY, or any value>
+"""
+
+import argparse
+import asyncio
+import math
+import sys
+from typing import Awaitable, Callable, Dict
+
+from config import Config
+from local_http import Request, Response, server_url, start_server
+from weather_service import (
+    CircuitOpenError, NotFoundError, RateLimitError, ServiceUnavailableError,
+    WeatherService, WeatherServiceError,
+)
+
+
+class WeatherAPIServer:
+    """
+    Request handler exposing a WeatherService over HTTP.
+
+    Responses are the models' OpenWeather-shaped payloads (``to_api()``),
+    which the WeatherService in each client parses as if it were talking
+    to OpenWeather.
+
+    Args:
+        service: Shared WeatherService
+        client_key: appid clients must send (empty accepts any)
+    """
+
+    def __init__(self, service: WeatherService, client_key: str = ""):
+        self.service = service
+        self.client_key = client_key
+
+        weather = self._lookup(
+            service.get_weather, service.get_weather_by_coordinates
+        )
+        forecast = self._lookup(
+            service.get_forecast, service.get_forecast_by_coordinates
+        )
+        self.routes: Dict[str, Callable[[Request], Awaitable[Response]]] = {
+            "/data/2.5/weather": weather,
+            "/weather": weather,
+            "/data/2.5/forecast": forecast,
+            "/forecast": forecast,
+            "/geo/1.0/direct": self.geocode,
+            "/metrics": self.metrics,
+            "/health": self.health,
+        }
+
+    async def __call__(self, request: Request) -> Response:
+        path = request.path.rstrip("/") or "/"
+        route = self.routes.get(path)
+        if route is None:
+            return Response.error(404, "Not found")
+
+        if (self.client_key and path not in ("/health", "/metrics")
+                and request.query.get("appid") != self.client_key):
+            return Response.error(401, "Invalid API key.")
+
+        units = request.query.get("units", Config.UNITS)
+        if units != Config.UNITS:
+            return Response.error(400, f"This server only serves units={Config.UNITS}")
+
+        try:
+            return await route(request)
+        except NotFoundError as e:
+            return Response.error(404, str(e))
+        except RateLimitError as e:
+            retry_after = math.ceil(self.service.rate_limiter.wait_time()) or 1
+            return Response.error(429, str(e), {"Retry-After": str(retry_after)})
+        except CircuitOpenError as e:
+            retry_after = math.ceil(self.service.circuit_breaker.reset_timeout)
+            return Response.error(503, str(e), {"Retry-After": str(retry_after)})
+        except ServiceUnavailableError as e:
+            return Response.error(502, str(e))
+        except WeatherServiceError as e:
+            # Bad upstream payloads and other service faults, not the client's
+            return Response.error(502, str(e))
+
+    def _lookup(self, by_city, by_coordinates):
+        """Build a handler answering by city name or by lat/lon."""
+
+        async def handle(request: Request) -> Response:
+            query = request.query
+            if "lat" in query and "lon" in query:
+                try:
+                    lat, lon = float(query["lat"]), float(query["lon"])
+                except ValueError:
+                    return Response.error(400, "wrong latitude or longitude")
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    return Response.error(400, "wrong latitude or longitude")
+                model = await by_coordinates(lat, lon)
+            elif query.get("q"):
+                model = await by_city(query["q"])
+            else:
+                return Response.error(400, "Provide q or lat and lon")
+            return Response.json(model.to_api())
+
+        return handle
+
+    async def geocode(self, request: Request) -> Response:
+        city = request.query.get("q", "")
+        if not city:
+            return Response.error(400, "Nothing to geocode")
+        try:
+            location = await self.service.resolve_city(city)
+        except NotFoundError:
+            # OpenWeather answers unknown places with an empty list
+            return Response.json([])
+        return Response.json([location.to_api()])
+
+    async def metrics(self, request: Request) -> Response:
+        if request.query.get("format") == "json":
+            return Response.json(self.service.metrics.snapshot())
+        return Response(
+            200,
+            self.service.metrics.to_prometheus().encode(),
+            {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def health(self, request: Request) -> Response:
+        return Response.json({
+            "status": "ok",
+            "breaker": self.service.circuit_breaker.state,
+            "cache_entries": self.service.cache_stats["size"],
+        })
+
+
+async def serve(host: str, port: int, client_key: str):
+    async with WeatherService() as service:
+        Config.validate()
+        server = await start_server(WeatherAPIServer(service, client_key), host, port)
+        url = server_url(server)
+        if service.base_url.startswith(url):
+            raise SystemExit(
+                "OPENWEATHER_BASE_URL points at this server; "
+                "the server must talk to OpenWeather itself."
+            )
+
+        print(f"Weather API server listening on {url}")
+        print("Point clients at it with:")
+        print(f"  OPENWEATHER_BASE_URL={url}/data/2.5/weather")
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Shared weather API server")
+    parser.add_argument("--host", default=None, help="default WEATHER_SERVER_HOST")
+    parser.add_argument("--port", type=int, default=None, help="default WEATHER_SERVER_PORT")
+    args = parser.parse_args()
+
+    host = args.host or Config.SERVER_HOST
+    port = args.port if args.port is not None else Config.SERVER_PORT
+    try:
+        asyncio.run(serve(host, port, Config.SERVER_CLIENT_KEY))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# themes.py
+"""Color palettes for the app's light, dark and pink themes.
+
+Controls use Material color roles (``ft.Colors.PRIMARY``,
+``ft.Colors.OUTLINE``, ...) that Flutter resolves from the page theme,
+so switching themes is mostly one page-level property change.
+
+The card and input fills have no fitting role that Flet can set (the
+surface container roles are missing from either ``ft.ColorScheme`` or
+``ft.Colors``). They stay plain palette colors, which the app reapplies
+to its cards and search field with ``card_bg()`` and ``input_style()``.
+
+Each palette is built into its ``ft.Theme`` once and reused.
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import flet as ft
+
+
+@dataclass(frozen=True)
+class Palette:
+    """The colors of one theme, named by what they are used for."""
+
+    __slots__ = (
+        "name", "mode", "icon",
+        "bg", "title", "input_border", "input_bg", "input_label",
+        "button_bg", "button_text", "location_button_bg",
+        "container_bg", "card_bg", "text_primary", "text_secondary",
+        "temp_color", "icon_color", "error_color", "divider",
+        "suggestion_hover",
+    )
+
+    name: str
+    mode: ft.ThemeMode
+    icon: str  # theme button icon
+    bg: str
+    title: str
+    input_border: str
+    input_bg: str
+    input_label: str
+    button_bg: str
+    button_text: str
+    location_button_bg: str
+    container_bg: str
+    card_bg: str
+    text_primary: str
+    text_secondary: str
+    temp_color: str
+    icon_color: str
+    error_color: str
+    divider: str
+    suggestion_hover: str
+
+    def color_scheme(self) -> ft.ColorScheme:
+        """Map the palette onto color scheme roles."""
+        return ft.ColorScheme(
+            surface=self.bg,
+            on_surface=self.text_primary,
+            on_surface_variant=self.text_secondary,
+            primary=self.icon_color,
+            on_primary=self.button_text,
+            primary_container=self.button_bg,
+            on_primary_container=self.button_text,
+            secondary=self.title,
+            secondary_container=self.container_bg,
+            on_secondary_container=self.text_primary,
+            tertiary=self.temp_color,
+            tertiary_container=self.location_button_bg,
+            on_tertiary_container=self.button_text,
+            error=self.error_color,
+            outline=self.input_border,
+            outline_variant=self.divider,
+        )
+
+    def theme(self) -> ft.Theme:
+        return ft.Theme(
+            color_scheme=self.color_scheme(),
+            scaffold_bgcolor=self.bg,
+            hover_color=self.suggestion_hover,
+        )
+
+
+# Role tokens for each palette color, for use on controls
+BG = ft.Colors.SURFACE
+TITLE = ft.Colors.SECONDARY
+INPUT_BORDER = ft.Colors.OUTLINE
+BUTTON_BG = ft.Colors.PRIMARY_CONTAINER
+BUTTON_TEXT = ft.Colors.ON_PRIMARY_CONTAINER
+LOCATION_BUTTON_BG = ft.Colors.TERTIARY_CONTAINER
+LOCATION_BUTTON_TEXT = ft.Colors.ON_TERTIARY_CONTAINER
+CONTAINER_BG = ft.Colors.SECONDARY_CONTAINER
+TEXT_PRIMARY = ft.Colors.ON_SURFACE
+TEXT_SECONDARY = ft.Colors.ON_SURFACE_VARIANT
+TEMP_COLOR = ft.Colors.TERTIARY
+ICON_COLOR = ft.Colors.PRIMARY
+ERROR_COLOR = ft.Colors.ERROR
+DIVIDER = ft.Colors.OUTLINE_VARIANT
+
+# Shared style objects
+PANEL_BORDER = ft.border.all(2, INPUT_BORDER)
+CARD_BORDER = ft.border.all(1, INPUT_BORDER)
+SUGGESTION_BORDER = ft.border.only(bottom=ft.BorderSide(1, DIVIDER))
+SEARCH_BUTTON_STYLE = ft.ButtonStyle(color=BUTTON_TEXT, bgcolor=BUTTON_BG)
+LOCATION_BUTTON_STYLE = ft.ButtonStyle(color=LOCATION_BUTTON_TEXT, bgcolor=LOCATION_BUTTON_BG)
+
+
+PALETTES: Dict[str, Palette] = {
+    palette.name: palette
+    for palette in (
+        Palette(
+            name="light",
+            mode=ft.ThemeMode.LIGHT,
+            icon=ft.Icons.SUNNY,
+            bg=ft.Colors.WHITE,
+            title=ft.Colors.BLUE_700,
+            input_border=ft.Colors.BLUE_400,
+            input_bg=ft.Colors.WHITE,
+            input_label=ft.Colors.BLUE_600,
+            button_bg=ft.Colors.BLUE_700,
+            button_text=ft.Colors.WHITE,
+            location_button_bg=ft.Colors.GREEN_700,
+            container_bg=ft.Colors.BLUE_50,
+            card_bg=ft.Colors.WHITE,
+            text_primary=ft.Colors.BLACK,
+            text_secondary=ft.Colors.GREY_700,
+            temp_color=ft.Colors.BLUE_900,
+            icon_color=ft.Colors.BLUE_700,
+            error_color=ft.Colors.RED_700,
+            divider=ft.Colors.BLUE_200,
+            suggestion_hover=ft.Colors.GREY_100,
+        ),
+        Palette(
+            name="dark",
+            mode=ft.ThemeMode.DARK,
+            icon=ft.Icons.DARK_MODE,
+            bg="#121212",
+            title=ft.Colors.BLUE_300,
+            input_border=ft.Colors.BLUE_700,
+            input_bg="#1e1e1e",
+            input_label=ft.Colors.BLUE_400,
+            button_bg=ft.Colors.BLUE_800,
+            button_text=ft.Colors.WHITE,
+            location_button_bg=ft.Colors.GREEN_800,
+            container_bg="#1e1e1e",
+            card_bg="#2d2d2d",
+            text_primary=ft.Colors.WHITE,
+            text_secondary=ft.Colors.GREY_400,
+            temp_color=ft.Colors.BLUE_300,
+            icon_color=ft.Colors.BLUE_400,
+            error_color=ft.Colors.RED_300,
+            divider=ft.Colors.BLUE_900,
+            suggestion_hover="#3d3d3d",
+        ),
+        Palette(
+            name="pink",
+            mode=ft.ThemeMode.LIGHT,
+            icon=ft.Icons.FAVORITE,
+            bg="#fff0f5",
+            title=ft.Colors.PINK_700,
+            input_border=ft.Colors.PINK_300,
+            input_bg=ft.Colors.WHITE,
+            input_label=ft.Colors.PINK_600,
+            button_bg=ft.Colors.PINK_400,
+            button_text=ft.Colors.WHITE,
+            location_button_bg=ft.Colors.PINK_500,
+            container_bg="#ffe4f0",
+            card_bg=ft.Colors.WHITE,
+            text_primary=ft.Colors.PINK_900,
+            text_secondary=ft.Colors.PINK_700,
+            temp_color=ft.Colors.PINK_800,
+            icon_color=ft.Colors.PINK_600,
+            error_color=ft.Colors.RED_700,
+            divider=ft.Colors.PINK_200,
+            suggestion_hover="#ffe4f0",
+        ),
+    )
+}
+
+# Order the theme button cycles through
+THEME_ORDER = ("light", "dark", "pink")
+
+_themes: Dict[str, ft.Theme] = {}
+
+
+def get_theme(name: str) -> ft.Theme:
+    """The built ``ft.Theme`` for a palette (created once)."""
+    theme = _themes.get(name)
+    if theme is None:
+        theme = _themes[name] = PALETTES[name].theme()
+    return theme
+
+
+def next_theme(name: str) -> str:
+    """The theme after ``name`` in the cycle."""
+    return THEME_ORDER[(THEME_ORDER.index(name) + 1) % len(THEME_ORDER)]
+
+
+def card_bg(name: str) -> str:
+    """Card fill of a palette."""
+    return PALETTES[name].card_bg
+
+
+def input_style(text_field: ft.TextField, name: str):
+    """Apply a palette's fill and label color to a text field."""
+    palette = PALETTES[name]
+    text_field.bgcolor = palette.input_bg
+    text_field.label_style = ft.TextStyle(color=palette.input_label)
+
+
+def apply_theme(page: ft.Page, name: str):
+    """
+    Switch the page to a palette.
+
+    Only page-level theme properties change; call ``page.update()`` after.
+    """
+    palette = PALETTES[name]
+    page.theme_mode = palette.mode
+    if palette.mode == ft.ThemeMode.DARK:
+        page.dark_theme = get_theme(name)
+    else:
+        page.theme = get_theme(name)
@@ -0,0 +1,90 @@
+# update_scheduler.py
+"""Coalesced page updates.
+
+Every ``page.update()`` diffs the whole page and sends the changes to the
+client. Handlers that fire in quick succession (keystrokes, a search
+turning the spinner on, filling two panels, turning it off) would each
+send their own diff. UpdateScheduler lets them mark the page dirty
+instead and sends one diff per frame.
+"""
+
+import threading
+from typing import Dict
+
+import flet as ft
+
+FRAME_INTERVAL = 1 / 60  # seconds
+
+
+class UpdateScheduler:
+    """
+    Batch page updates into at most one per frame.
+
+    ``request()`` is cheap and safe to call from any thread (Flet runs
+    sync event handlers in a thread pool); the update is sent from the
+    page's event loop once the frame interval has passed. ``flush()``
+    sends immediately, for changes the user is waiting to see.
+
+    Args:
+        page: Page to update
+        interval: Seconds to wait for more changes before sending
+    """
+
+    def __init__(self, page: ft.Page, interval: float = FRAME_INTERVAL):
+        self.page = page
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._scheduled = False
+        self._handle = None  # pending flush timer
+        self._closed = False
+
+        # Counters
+        self.requests = 0
+        self.updates = 0
+
+    def request(self):
+        """Mark the page dirty; it is updated on the next frame."""
+        with self._lock:
+            if self._closed:
+                return
+            self.requests += 1
+            self._dirty = True
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.page.loop.call_soon_threadsafe(self._arm)
+
+    def _arm(self):
+        if not self._closed:
+            self._handle = self.page.loop.call_later(self.interval, self._on_frame)
+
+    def _on_frame(self):
+        with self._lock:
+            self._scheduled = False
+            self._handle = None
+            dirty = self._dirty
+        if dirty:
+            self.flush()
+
+    def flush(self):
+        """Send pending changes now."""
+        with self._lock:
+            if self._closed:
+                return
+            self._dirty = False
+            self.updates += 1
+        self.page.update()
+
+    def close(self):
+        """Drop pending changes and stop scheduling updates."""
+        with self._lock:
+            self._closed = True
+            handle, self._handle = self._handle, None
+        if handle is not None:
+            self.page.loop.call_soon_threadsafe(handle.cancel)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Update counters."""
+        return {"requests": self.requests, "updates": self.updates}
@@ -0,0 +1,278 @@
+# weather_cli.py
+"""Headless batch lookups through WeatherService.
+
+Reads one query per line, either a city name or "lat,lon", from a file
+or stdin, fetches them concurrently and writes one JSON object per line
+(NDJSON) as each lookup completes. Blank lines and lines starting with
+'#' are ignored. A summary of timing and error counts goes to stderr.
+
+Input is read lazily and only the lookups in flight are held in memory,
+so the footprint does not grow with the input. With --state, progress
+is checkpointed so an interrupted run can be restarted with the same
+arguments and continue where it stopped. A resumed run appends to the
+output file; results that finished after the last checkpoint are fetched
+and written again, so the output can repeat a few "line" numbers (keep
+the last record for each line).
+
+Usage:
+    python weather_cli.py cities.txt > results.ndjson
+    cat cities.txt | python weather_cli.py - --forecast --concurrency 20
+    python weather_cli.py cities.txt --output results.ndjson --state run.state
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import IO, Dict, Iterator, Optional, Set
+
+from metrics import Histogram
+from models import BatchResult, Query
+
+
+def parse_query(line: str) -> Optional[Query]:
+    """Parse an input line into a city name or (lat, lon) pair."""
+    text = line.strip()
+    if not text or text.startswith("#"):
+        return None
+
+    parts = text.split(",")
+    if len(parts) == 2:
+        try:
+            return float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+    return text
+
+
+class Progress:
+    """
+    Checkpoint of completed input lines.
+
+    Results finish out of order, so progress is a watermark (every line
+    up to it is done) plus the few completed lines above it.
+
+    Args:
+        path: State file, or None to keep progress in memory only
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.watermark = 0
+        self.done_above: Set[int] = set()
+
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.watermark = state.get("watermark", 0)
+            self.done_above = set(state.get("done_above", []))
+
+    def is_done(self, line_no: int) -> bool:
+        return line_no <= self.watermark or line_no in self.done_above
+
+    def mark_done(self, line_no: int):
+        if line_no <= self.watermark:
+            return
+        self.done_above.add(line_no)
+        while self.watermark + 1 in self.done_above:
+            self.watermark += 1
+            self.done_above.remove(self.watermark)
+
+    def save(self):
+        """Write the state file atomically."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "watermark": self.watermark,
+                "done_above": sorted(self.done_above),
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+class BatchRun:
+    """
+    One CLI run: feeds queries to the service and writes the results.
+
+    Args:
+        service: WeatherService to query
+        output: Stream receiving NDJSON lines
+        progress: Completed-line checkpoint
+        forecast: Fetch forecasts instead of current weather
+        concurrency: Maximum lookups in flight
+        checkpoint_every: Save progress after this many results
+    """
+
+    def __init__(self, service, output: IO[str], progress: Progress,
+                 forecast: bool = False, concurrency: Optional[int] = None,
+                 checkpoint_every: int = 100):
+        self.service = service
+        self.output = output
+        self.progress = progress
+        self.forecast = forecast
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+
+        # Input line of each query in flight, keyed by its position in
+        # the batch (BatchResult.index)
+        self._line_numbers: Dict[int, int] = {}
+
+        # Summary counters (constant size)
+        self.ok = 0
+        self.skipped = 0
+        self.errors: Counter = Counter()
+        self.latency = Histogram()
+
+    def queries(self, lines: Iterator[str]) -> Iterator[Query]:
+        """Parse input lazily, skipping lines completed in an earlier run."""
+        index = 0
+        for line_no, line in enumerate(lines, start=1):
+            query = parse_query(line)
+            if self.progress.is_done(line_no):
+                if query is not None:
+                    self.skipped += 1
+                continue
+            if query is None:
+                # Nothing to fetch; counts as done for the watermark
+                self.progress.mark_done(line_no)
+                continue
+            self._line_numbers[index] = line_no
+            index += 1
+            yield query
+
+    def write(self, line_no: int, result: BatchResult):
+        record = {
+            "line": line_no,
+            "query": result.query,
+            "ok": result.ok,
+            "elapsed_ms": round(result.elapsed * 1000, 2),
+        }
+        if result.ok:
+            record["data"] = result.data.to_api()
+        else:
+            record["error"] = str(result.error)
+            record["error_type"] = type(result.error).__name__
+        self.output.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    async def run(self, lines: Iterator[str]):
+        fetch_many = (
+            self.service.get_forecast_many if self.forecast
+            else self.service.get_weather_many
+        )
+        since_checkpoint = 0
+        try:
+            async for result in fetch_many(self.queries(lines), self.concurrency):
+                line_no = self._line_numbers.pop(result.index)
+                self.write(line_no, result)
+
+                self.latency.observe(result.elapsed)
+                if result.ok:
+                    self.ok += 1
+                else:
+                    self.errors[type(result.error).__name__] += 1
+
+                # Only checkpoint lines whose output has been flushed
+                self.progress.mark_done(line_no)
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    self.output.flush()
+                    self.progress.save()
+                    since_checkpoint = 0
+        finally:
+            self.output.flush()
+            self.progress.save()
+
+    def summary(self, elapsed: float) -> Dict[str, object]:
+        done = self.ok + sum(self.errors.values())
+        return {
+            "completed": done,
+            "ok": self.ok,
+            "failed": sum(self.errors.values()),
+            "errors": dict(self.errors),
+            "skipped": self.skipped,
+            "seconds": round(elapsed, 3),
+            "per_second": round(done / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(self.latency.quantile(0.5) * 1000, 1),
+            "p99_ms": round(self.latency.quantile(0.99) * 1000, 1),
+            "watermark": self.progress.watermark,
+            "upstream_calls": self.service.quota["total_calls"],
+            "cache_hit_ratio": round(self.service.cache_stats["hit_ratio"], 3),
+        }
+
+
+async def main_async(args) -> int:
+    if args.no_cache:
+        os.environ["WEATHER_CACHE_ENABLED"] = "false"
+    from config import Config
+    from weather_service import WeatherService
+
+    Config.reload()
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    resuming = bool(args.state) and os.path.exists(args.state)
+    progress = Progress(args.state)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    if args.output == "-":
+        output = sys.stdout
+    else:
+        # Resumed runs add to the results they already wrote
+        output = open(args.output, "a" if resuming else "w", encoding="utf-8")
+
+    started = time.perf_counter()
+    try:
+        async with WeatherService() as service:
+            batch = BatchRun(
+                service, output, progress,
+                forecast=args.forecast,
+                concurrency=args.concurrency,
+                checkpoint_every=args.checkpoint_every,
+            )
+            try:
+                await batch.run(source)
+            finally:
+                summary = batch.summary(time.perf_counter() - started)
+                print(json.dumps(summary), file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if summary["failed"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Fetch weather for many cities as NDJSON"
+    )
+    parser.add_argument("input", help="file with one city or 'lat,lon' per line, or -")
+    parser.add_argument("--output", "-o", default="-", help="NDJSON file (default stdout)")
+    parser.add_argument("--forecast", action="store_true",
+                        help="fetch 5-day forecasts instead of current weather")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        help="lookups in flight (default WEATHER_BATCH_CONCURRENCY)")
+    parser.add_argument("--state", help="progress file for resumable runs (an existing one resumes "
+                             "and appends to --output)")
+    parser.add_argument("--checkpoint-every", type=int, default=100,
+                        help="save progress every N results")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always query the API")
+    args = parser.parse_args()
+
+    try:
+        return asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        # Progress was saved; rerun with the same --state to continue
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
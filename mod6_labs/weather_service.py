@@ -1,9 +1,37 @@
 # weather_service.py
 """Weather API service layer with forecast support."""
 
-import httpx
-from typing import Dict, Optional
+import asyncio
+import dataclasses
+import importlib.util
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Awaitable, Callable,
+    Dict, Hashable, Iterable, List, Optional, Tuple, Union,
+)
+from cache import FRESH, STALE, TTLCache
 from config import Config
+from metrics import Metrics
+from models import BatchResult, CurrentWeather, ForecastSeries, Location, Query
+from rate_limit import RateLimiter
+from resilience import HALF_OPEN, OPEN, CircuitBreaker, backoff_delay
+
+if TYPE_CHECKING:
+    # httpx and sqlite3 are imported on first use to keep startup fast
+    import httpx
+    from disk_cache import DiskCache
+    from observation_store import ObservationStore
+
+
+# Model type stored under each cache key's endpoint
+MODEL_TYPES = {
+    "weather": CurrentWeather,
+    "forecast": ForecastSeries,
+    "geocode": Location,
+    "iplocation": Location,
+}
 
 
 class WeatherServiceError(Exception):
@@ -11,166 +39,1134 @@ class WeatherServiceError(Exception):
     pass
 
 
+class ConfigurationError(WeatherServiceError):
+    """Raised when a required setting, such as the API key, is missing."""
+    pass
+
+
+class NotFoundError(WeatherServiceError):
+    """Raised when the city or place does not exist."""
+    pass
+
+
+class RateLimitError(WeatherServiceError):
+    """Raised when the API key's call budget is exhausted."""
+    pass
+
+
+class ServiceUnavailableError(WeatherServiceError):
+    """Raised on timeouts, network errors and 5xx responses."""
+    pass
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """Raised without a network call while the circuit breaker is open."""
+    pass
+
+
 class WeatherService:
-    """Service for fetching weather data from OpenWeatherMap API."""
-    
-    def __init__(self):
+    """
+    Service for fetching weather data from OpenWeatherMap API.
+
+    The service owns a single pooled ``httpx.AsyncClient`` so repeated
+    lookups reuse keep-alive connections instead of paying a new TCP/TLS
+    handshake per request. Close it with ``aclose()`` or use the service
+    as an async context manager.
+
+    Responses are kept in a TTL + LRU cache. Repeat lookups are served from
+    memory, and expired entries are returned immediately while a refresh
+    runs in the background (stale-while-revalidate).
+
+    When ``Config.CACHE_DB_PATH`` is set, responses are also written to a
+    SQLite store so a restarted app can render from disk without waiting
+    on the network. Its reads and writes run in a worker thread.
+
+    City names are geocoded once to canonical coordinates and all lookups
+    go by coordinates, which keeps cache keys consistent across spellings.
+
+    Identical requests that are already in flight are coalesced: every
+    caller awaits the same upstream call and shares its result or error.
+    When every caller waiting on a call has been cancelled, the upstream
+    request is cancelled too.
+
+    Responses are parsed into compact models (CurrentWeather,
+    ForecastSeries, Location) and only the models are cached.
+
+    Upstream calls are metered by a client-side RateLimiter using the
+    per-minute and per-day budgets in Config. Under pressure calls queue
+    briefly, and stale cached data is served instead of spending the key.
+
+    When ``Config.OBSERVATIONS_DIR`` is set, every newly fetched current
+    weather report is appended to an ObservationStore for history charts.
+
+    Transient failures are retried with jittered exponential backoff, and
+    a circuit breaker fails fast while the upstream is down so searches do
+    not each wait out the full timeout.
+
+    Construction is cheap: the HTTP client (and httpx itself) is only
+    created on the first upstream request, so a UI can paint before the
+    network stack loads.
+
+    With ``Config.METRICS_ENABLED`` the service records per-endpoint
+    latency histograms, status and exception counters and in-flight
+    gauges in ``self.metrics``; cache, quota and breaker stats are always
+    exported from there.
+    """
+
+    def __init__(
+        self,
+        client: Optional["httpx.AsyncClient"] = None,
+        cache: Optional[TTLCache] = None,
+        store: Optional["DiskCache"] = None,
+        observations: Optional["ObservationStore"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[Metrics] = None,
+    ):
         self.api_key = Config.API_KEY
         self.base_url = Config.BASE_URL
-        self.forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
+        self.forecast_url = Config.FORECAST_URL or (
+            self.base_url.rsplit("/", 1)[0] + "/forecast"
+        )
+        self.geocoding_url = Config.GEOCODING_URL or (
+            "{0.scheme}://{0.netloc}/geo/1.0/direct".format(urlsplit(self.base_url))
+        )
         self.timeout = Config.TIMEOUT
-    
-    async def get_weather(self, city: str) -> Dict:
+
+        # Only close the client if we created it ourselves; created lazily
+        self._owns_client = client is None
+        self._client = client
+
+        self.cache_enabled = Config.CACHE_ENABLED
+        self.cache = cache if cache is not None else TTLCache(
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            stale_ttl=Config.CACHE_STALE_TTL,
+        )
+        self._refresh_tasks: Dict[Hashable, asyncio.Task] = {}
+        self.store = store if store is not None else self._open_store()
+        self.observations = (
+            observations if observations is not None else self._open_observations()
+        )
+
+        # Upstream calls in flight, keyed on endpoint + params (single-flight)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.coalesced_requests = 0
+        self.cancelled_requests = 0
+
+        self.rate_limiter = rate_limiter or RateLimiter(
+            per_minute=Config.RATE_LIMIT_PER_MINUTE,
+            per_day=Config.RATE_LIMIT_PER_DAY,
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=Config.BREAKER_RESET_TIMEOUT,
+        )
+        self.retries = 0
+
+        self.metrics = metrics or Metrics(enabled=Config.METRICS_ENABLED)
+        self.metrics.register_collector("cache", lambda: self.cache.stats)
+        self.metrics.register_collector("quota", lambda: self.rate_limiter.quota)
+        self.metrics.register_collector(
+            "breaker", lambda: self.circuit_breaker.stats
+        )
+        self.metrics.register_collector("service", lambda: {
+            "retries": self.retries,
+            "coalesced_requests": self.coalesced_requests,
+            "cancelled_requests": self.cancelled_requests,
+            "inflight_upstream": len(self._inflight),
+            "background_refreshes": len(self._refresh_tasks),
+        })
+        self._endpoints = {
+            self.base_url: "weather",
+            self.forecast_url: "forecast",
+            self.geocoding_url: "geocode",
+        }
+
+    def _open_store(self) -> Optional["DiskCache"]:
+        """Open the persistent cache if enabled; disable it on failure."""
+        if not (self.cache_enabled and Config.CACHE_DB_PATH):
+            return None
+
+        import sqlite3
+        from disk_cache import DiskCache
+
+        try:
+            return DiskCache(
+                Config.CACHE_DB_PATH,
+                max_entries=Config.CACHE_DB_MAX_ENTRIES,
+                stale_ttl=Config.CACHE_STALE_TTL,
+            )
+        except (sqlite3.Error, OSError):
+            return None
+
+    def _open_observations(self) -> Optional["ObservationStore"]:
+        """Open the observation history if enabled (loads numpy)."""
+        if not Config.OBSERVATIONS_DIR:
+            return None
+
+        from observation_store import ObservationStore
+
+        try:
+            return ObservationStore(Config.OBSERVATIONS_DIR)
+        except (OSError, ValueError):
+            return None
+
+    def _create_client(self) -> "httpx.AsyncClient":
+        """Create the shared HTTP client with pooling and keep-alive."""
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=Config.MAX_CONNECTIONS,
+            max_keepalive_connections=Config.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.KEEPALIVE_EXPIRY,
+        )
+        # HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+        http2 = Config.HTTP2 and importlib.util.find_spec("h2") is not None
+        # Fail fast on unreachable hosts instead of waiting the full timeout
+        timeout = httpx.Timeout(self.timeout, connect=Config.CONNECT_TIMEOUT)
+        return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
         """
-        Fetch weather data for a given city.
-        
+        The shared HTTP client, created on first use.
+
+        Raises:
+            ConfigurationError: If the API key is missing
+        """
+        return self._get_client()
+
+    def _get_client(self, require_key: bool = True) -> "httpx.AsyncClient":
+        """
+        The shared HTTP client, created on first use.
+
         Args:
-            city: Name of the city
-            
+            require_key: Check that the OpenWeather API key is configured
+                (keyless services such as IP geolocation skip this)
+
+        Raises:
+            ConfigurationError: If the API key is required but missing
+        """
+        if require_key and self._owns_client:
+            try:
+                Config.validate()
+            except ValueError as e:
+                raise ConfigurationError(str(e)) from e
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the underlying HTTP client has been closed."""
+        return self._client is not None and self._client.is_closed
+
+    @property
+    def cache_stats(self) -> Dict[str, float]:
+        """Cache hit/miss counters, useful for tuning TTLs."""
+        return self.cache.stats
+
+    @property
+    def quota(self) -> Dict[str, float]:
+        """API key usage and remaining rate budget."""
+        return self.rate_limiter.quota
+
+    async def aclose(self):
+        """Close the pooled HTTP client and release its connections."""
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        self._refresh_tasks.clear()
+
+        if self._owns_client and self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+        if self.store is not None:
+            store, self.store = self.store, None
+            await asyncio.to_thread(store.close)
+
+        if self.observations is not None:
+            # Saves the batched index
+            await asyncio.to_thread(self.observations.close)
+
+    async def __aenter__(self) -> "WeatherService":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    @staticmethod
+    def _city_key(endpoint: str, city: str) -> Hashable:
+        """Cache key for a city lookup, normalized for case and spacing."""
+        return (endpoint, " ".join(city.split()).lower(), Config.UNITS)
+
+    @staticmethod
+    def _coord_key(endpoint: str, lat: float, lon: float) -> Hashable:
+        """Cache key for a coordinate lookup (rounded to ~100 m)."""
+        return (endpoint, (round(lat, 3), round(lon, 3)), Config.UNITS)
+
+    async def _cached(
+        self,
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return a cached model, fetching it on a miss.
+
+        Stale entries are returned right away and refreshed in the
+        background.
+
+        Args:
+            key: Cache key
+            ttl: Seconds a fresh response stays valid
+            fetch: Coroutine function that performs the upstream request
+                and parses the response into a model
+
         Returns:
-            Dictionary containing weather data
-            
+            Model instance
+        """
+        if not self.metrics.enabled:
+            return await self._lookup(key, ttl, fetch)
+
+        labels = (("endpoint", key[0]),)
+        started = time.perf_counter()
+        try:
+            return await self._lookup(key, ttl, fetch)
+        finally:
+            self.metrics.observe(
+                "lookup_seconds", labels, time.perf_counter() - started
+            )
+
+    async def _lookup(
+        self,
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Serve a model from memory or disk, or fetch it (see _cached)."""
+        if not self.cache_enabled:
+            return await fetch()
+
+        # One outcome per lookup: a memory miss served from disk counts
+        # as "disk" only
+        value, state = self.cache.lookup(key)
+        result = state or "miss"
+        if state is None:
+            loaded = await self._load_from_store(key)
+            if loaded is not None:
+                value, state = loaded
+                result = "disk"
+        self.metrics.inc("cache_lookups_total", (
+            ("endpoint", key[0]), ("result", result),
+        ))
+
+        if state == FRESH:
+            return value
+        if state == STALE:
+            # Out of budget or upstream down: keep serving the stale copy
+            if (self.rate_limiter.has_capacity()
+                    and self.circuit_breaker.state != OPEN):
+                self._schedule_refresh(key, ttl, fetch)
+            return value
+
+        value = await fetch()
+        await self._remember(key, value, ttl)
+        return value
+
+    async def _remember(self, key: Hashable, value: Any, ttl: float):
+        """Store a fresh model in memory and on disk."""
+        self.cache.set(key, value, ttl)
+        if self.store is not None:
+            # SQLite commits block; keep them off the event loop
+            await asyncio.to_thread(self.store.set, key, value.to_api(), ttl)
+
+    async def _load_from_store(self, key: Hashable) -> Optional[Tuple[Any, str]]:
+        """
+        Copy a persisted response into the memory cache, if any.
+
+        Returns:
+            Tuple of (model, FRESH or STALE), or None if nothing usable
+            is stored
+        """
+        if self.store is None:
+            return None
+
+        found = await asyncio.to_thread(self.store.get, key)
+        if found is None:
+            return None
+
+        payload, remaining = found
+        try:
+            value = MODEL_TYPES[key[0]].from_api(payload)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+        # A negative remaining TTL lands the entry as stale
+        self.cache.set(key, value, remaining)
+        return value, FRESH if remaining > 0 else STALE
+
+    def _schedule_refresh(
+        self,
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+    ):
+        """Start a background refresh for a key unless one is running."""
+        if key in self._refresh_tasks:
+            return
+
+        task = asyncio.ensure_future(self._refresh(key, ttl, fetch))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda t: self._refresh_tasks.pop(key, None))
+
+    async def _refresh(
+        self,
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+    ):
+        """Refetch a stale entry; keep serving the old copy on failure."""
+        try:
+            value = await fetch()
+        except WeatherServiceError:
+            return
+        await self._remember(key, value, ttl)
+
+    def load_session(self) -> Tuple[str, List[str]]:
+        """
+        Load the last viewed city and search history from disk.
+
+        Returns:
+            Tuple of (last city, search history); empty when nothing is
+            persisted
+        """
+        if self.store is None:
+            return "", []
+        return (
+            self.store.get_meta("last_city", ""),
+            self.store.get_meta("search_history", []),
+        )
+
+    def save_session(self, last_city: str, history: List[str]):
+        """Persist the last viewed city and search history."""
+        if self.store is None:
+            return
+        self.store.set_meta("last_city", last_city)
+        self.store.set_meta("search_history", history)
+
+    def load_usage(self) -> Dict[str, int]:
+        """Load the app's persisted usage counters (empty if none)."""
+        if self.store is None:
+            return {}
+        return self.store.get_meta("usage", {})
+
+    def save_usage(self, usage: Dict[str, int]):
+        """Persist the app's usage counters."""
+        if self.store is None:
+            return
+        self.store.set_meta("usage", usage)
+
+    async def _get_json(
+        self,
+        url: str,
+        params: Dict,
+        not_found_message: str,
+        error_label: str,
+    ) -> Dict:
+        """
+        GET a JSON endpoint, sharing one upstream call between identical
+        concurrent requests.
+
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            not_found_message: Error message to use for a 404 response
+            error_label: Short description used in generic error messages
+
+        Returns:
+            Parsed JSON response
+
         Raises:
             WeatherServiceError: If the request fails
+            asyncio.CancelledError: If this caller was cancelled; the
+                upstream call is cancelled once no caller is left
         """
-        if not city:
-            raise WeatherServiceError("City name cannot be empty")
-        
-        # Build request parameters
-        params = {
-            "q": city,
-            "appid": self.api_key,
-            "units": Config.UNITS,
-        }
-        
+        key = (
+            url,
+            tuple(sorted(
+                (name, str(value))
+                for name, value in params.items()
+                if name != "appid"
+            )),
+        )
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._request_json(url, params, not_found_message, error_label)
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget_inflight(key, f))
+        else:
+            self.coalesced_requests += 1
+            self.metrics.inc("coalesced_requests_total", (
+                ("endpoint", self._endpoints.get(url, url)),
+            ))
+
+        # Shield so one caller giving up does not cancel the shared call;
+        # the last caller to leave cancels it instead
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            waiters = self._waiters.pop(future) - 1
+            if waiters:
+                self._waiters[future] = waiters
+            elif not future.done():
+                # Nobody wants the result any more (superseded search)
+                self._forget_inflight(key, future)
+                future.cancel()
+                self.cancelled_requests += 1
+                self.metrics.inc("cancelled_requests_total", (
+                    ("endpoint", self._endpoints.get(url, url)),
+                ))
+
+    def _forget_inflight(self, key: Hashable, future: asyncio.Future):
+        """Drop an in-flight entry unless a newer call replaced it."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def _get_model(
+        self,
+        model: type,
+        url: str,
+        params: Dict,
+        not_found_message: str,
+        error_label: str,
+    ) -> Any:
+        """
+        GET a JSON endpoint and parse the body into a model.
+
+        Args:
+            model: Model class with a ``from_api`` constructor
+            url: Endpoint URL
+            params: Query parameters
+            not_found_message: Error message to use for a 404 response
+            error_label: Short description used in generic error messages
+
+        Returns:
+            Model instance
+
+        Raises:
+            WeatherServiceError: If the request fails or the body is malformed
+        """
+        data = await self._get_json(url, params, not_found_message, error_label)
+        try:
+            return model.from_api(data)
+        except (KeyError, TypeError, ValueError, AttributeError, IndexError) as e:
+            raise WeatherServiceError(f"Unexpected {error_label} format: {str(e)}")
+
+    @staticmethod
+    def _retry_after(response: "httpx.Response") -> Optional[float]:
+        """Parse a Retry-After header (seconds or HTTP date)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
         try:
-            # Make async HTTP request
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                
-                # Check for HTTP errors
-                if response.status_code == 404:
-                    raise WeatherServiceError(
-                        f"City '{city}' not found. Please check the spelling."
-                    )
-                elif response.status_code == 401:
-                    raise WeatherServiceError(
-                        "Invalid API key. Please check your configuration."
-                    )
-                elif response.status_code >= 500:
-                    raise WeatherServiceError(
-                        "Weather service is currently unavailable. "
-                        "Please try again later."
-                    )
-                elif response.status_code != 200:
-                    raise WeatherServiceError(
-                        f"Error fetching weather data: {response.status_code}"
-                    )
-                
-                # Parse JSON response
-                data = response.json()
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    async def _request_json(
+        self,
+        url: str,
+        params: Dict,
+        not_found_message: str,
+        error_label: str,
+    ) -> Dict:
+        """
+        GET a JSON endpoint, retrying transient failures.
+
+        Timeouts, network errors, 5xx and 429 responses are retried up to
+        ``Config.MAX_RETRIES`` times with jittered exponential backoff.
+        While the circuit breaker is open, calls fail fast without
+        touching the network. The breaker sees one failure per request,
+        once its retries are used up, so a single outage does not count
+        once per attempt.
+
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            not_found_message: Error message to use for a 404 response
+            error_label: Short description used in generic error messages
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            WeatherServiceError: If the request fails
+            ServiceUnavailableError: If the upstream is unhealthy
+            RateLimitError: If the call budget is exhausted
+        """
+        # Fail on a missing key before spending a token or a breaker probe
+        self._get_client()
+
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise CircuitOpenError(
+                    "Weather service is currently unavailable. "
+                    "Please try again later."
+                )
+
+            if not await self.rate_limiter.acquire(
+                max_wait=Config.RATE_LIMIT_MAX_WAIT
+            ):
+                self.circuit_breaker.release_probe()
+                raise RateLimitError(
+                    "Too many requests right now. Please try again in a moment."
+                )
+
+            try:
+                data = await self._send(url, params, not_found_message, error_label)
+            except ServiceUnavailableError:
+                # A failed half-open probe reopens the breaker right away
+                if (attempt >= Config.MAX_RETRIES
+                        or self.circuit_breaker.state == HALF_OPEN):
+                    self.circuit_breaker.record_failure()
+                if attempt >= Config.MAX_RETRIES:
+                    raise
+            except RateLimitError:
+                # HTTP 429: healthy but throttled; the limiter now holds
+                # further calls back until Retry-After has passed
+                self.circuit_breaker.record_success()
+                if attempt >= Config.MAX_RETRIES:
+                    raise
+            except ConfigurationError:
+                # Nothing reached the upstream
+                self.circuit_breaker.release_probe()
+                raise
+            except WeatherServiceError:
+                # 4xx and bad payloads are not transient
+                self.circuit_breaker.record_success()
+                raise
+            except asyncio.CancelledError:
+                self.circuit_breaker.release_probe()
+                raise
+            else:
+                self.circuit_breaker.record_success()
                 return data
-                
+
+            attempt += 1
+            self.retries += 1
+            self.metrics.inc("retries_total", (
+                ("endpoint", self._endpoints.get(url, url)),
+            ))
+            await asyncio.sleep(backoff_delay(
+                attempt, Config.RETRY_BACKOFF_BASE, Config.RETRY_BACKOFF_MAX
+            ))
+
+    async def _send(
+        self,
+        url: str,
+        params: Dict,
+        not_found_message: str,
+        error_label: str,
+    ) -> Dict:
+        """
+        Perform a single GET request on the shared client.
+
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            not_found_message: Error message to use for a 404 response
+            error_label: Short description used in generic error messages
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        if not self.metrics.enabled:
+            return await self._send_once(url, params, not_found_message, error_label)
+
+        metrics = self.metrics
+        labels = (("endpoint", self._endpoints.get(url, url)),)
+        metrics.add("requests_in_flight", labels)
+        started = time.perf_counter()
+        try:
+            return await self._send_once(url, params, not_found_message, error_label)
+        except WeatherServiceError as e:
+            cause = e.__cause__ or e.__context__
+            metrics.inc("errors_total", labels + (
+                ("error", type(e).__name__),
+                ("exception", type(cause).__name__ if cause else "none"),
+            ))
+            raise
+        finally:
+            metrics.add("requests_in_flight", labels, -1)
+            metrics.observe(
+                "request_seconds", labels, time.perf_counter() - started
+            )
+
+    async def _send_once(
+        self,
+        url: str,
+        params: Dict,
+        not_found_message: str,
+        error_label: str,
+    ) -> Dict:
+        """The uninstrumented single GET behind _send."""
+        import httpx
+
+        try:
+            client = self._get_client()
+            response = await client.get(url, params=params)
+            if self.metrics.enabled:
+                self.metrics.inc("responses_total", (
+                    ("endpoint", self._endpoints.get(url, url)),
+                    ("status", str(response.status_code)),
+                ))
+
+            # Check for HTTP errors
+            if response.status_code == 429:
+                self.rate_limiter.backoff(self._retry_after(response))
+                raise RateLimitError(
+                    "Weather service rate limit reached. "
+                    "Please try again in a moment."
+                )
+            elif response.status_code == 404:
+                raise NotFoundError(not_found_message)
+            elif response.status_code == 401:
+                raise WeatherServiceError(
+                    "Invalid API key. Please check your configuration."
+                )
+            elif response.status_code >= 500:
+                raise ServiceUnavailableError(
+                    "Weather service is currently unavailable. "
+                    "Please try again later."
+                )
+            elif response.status_code != 200:
+                raise WeatherServiceError(
+                    f"Error fetching {error_label}: {response.status_code}"
+                )
+
+            self.rate_limiter.record_success()
+
+            # Parse JSON response
+            return response.json()
+
+        except WeatherServiceError:
+            raise
         except httpx.TimeoutException:
-            raise WeatherServiceError(
+            raise ServiceUnavailableError(
                 "Request timed out. Please check your internet connection."
             )
         except httpx.NetworkError:
-            raise WeatherServiceError(
+            raise ServiceUnavailableError(
                 "Network error. Please check your internet connection."
             )
+        except httpx.TransportError as e:
+            raise ServiceUnavailableError(f"HTTP error occurred: {str(e)}")
         except httpx.HTTPError as e:
             raise WeatherServiceError(f"HTTP error occurred: {str(e)}")
         except Exception as e:
             raise WeatherServiceError(f"An unexpected error occurred: {str(e)}")
-    
-    async def get_forecast(self, city: str) -> Dict:
+
+    async def resolve_city(self, city: str) -> Location:
         """
-        Get 5-day weather forecast for a given city.
-        
+        Resolve a free-text city name to canonical coordinates.
+
+        Results are cached in memory and in the persistent store, so each
+        name is only geocoded once per ``Config.GEOCODE_CACHE_TTL``.
+
         Args:
             city: Name of the city
-            
+
         Returns:
-            Dictionary containing forecast data
-            
+            Resolved location
+
         Raises:
-            WeatherServiceError: If the request fails
+            NotFoundError: If the city cannot be found
         """
         if not city:
             raise WeatherServiceError("City name cannot be empty")
-        
+
+        # Normalized so different spellings share one upstream call
         params = {
-            "q": city,
+            "q": " ".join(city.split()).lower(),
+            "limit": 1,
             "appid": self.api_key,
-            "units": Config.UNITS,
         }
-        
+
+        async def fetch() -> Location:
+            results = await self._get_json(
+                self.geocoding_url,
+                params,
+                f"City '{city}' not found. Please check the spelling.",
+                "location data",
+            )
+            if not results:
+                raise NotFoundError(
+                    f"City '{city}' not found. Please check the spelling."
+                )
+            return Location.from_api(results[0])
+
+        return await self._cached(
+            self._city_key("geocode", city),
+            Config.GEOCODE_CACHE_TTL,
+            fetch,
+        )
+
+    async def locate(self) -> Location:
+        """
+        Approximate the user's location from their IP address.
+
+        The result is cached in memory and in the persistent store for
+        ``Config.IP_LOCATION_CACHE_TTL``, and the lookup reuses the pooled
+        client. It does not count against the OpenWeather rate budget.
+
+        Returns:
+            Location with the city name and coordinates
+
+        Raises:
+            WeatherServiceError: If the location cannot be determined
+        """
+        return await self._cached(
+            ("iplocation", Config.IP_LOCATION_URL),
+            Config.IP_LOCATION_CACHE_TTL,
+            self._fetch_ip_location,
+        )
+
+    async def _fetch_ip_location(self) -> Location:
+        """Query the IP geolocation service (ipapi.co response format)."""
+        import httpx
+
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.forecast_url, params=params)
-                
-                # Check for HTTP errors
-                if response.status_code == 404:
-                    raise WeatherServiceError(
-                        f"City '{city}' not found. Please check the spelling."
-                    )
-                elif response.status_code == 401:
-                    raise WeatherServiceError(
-                        "Invalid API key. Please check your configuration."
-                    )
-                elif response.status_code >= 500:
-                    raise WeatherServiceError(
-                        "Weather service is currently unavailable. "
-                        "Please try again later."
-                    )
-                elif response.status_code != 200:
-                    raise WeatherServiceError(
-                        f"Error fetching forecast data: {response.status_code}"
-                    )
-                
-                return response.json()
-                
-        except httpx.TimeoutException:
-            raise WeatherServiceError(
-                "Request timed out. Please check your internet connection."
+            # The location service needs no OpenWeather key
+            client = self._get_client(require_key=False)
+            response = await client.get(Config.IP_LOCATION_URL)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.TransportError:
+            raise ServiceUnavailableError(
+                "Could not reach the location service. "
+                "Please check your internet connection."
             )
-        except httpx.NetworkError:
+        except (httpx.HTTPError, ValueError) as e:
+            raise WeatherServiceError(f"Location lookup failed: {str(e)}")
+
+        if data.get("error") or data.get("latitude") is None:
             raise WeatherServiceError(
-                "Network error. Please check your internet connection."
+                f"Location lookup failed: {data.get('reason', 'no coordinates')}"
             )
-        except httpx.HTTPError as e:
-            raise WeatherServiceError(f"HTTP error occurred: {str(e)}")
-        except Exception as e:
-            raise WeatherServiceError(f"An unexpected error occurred: {str(e)}")
-    
+        return Location(
+            name=data.get("city") or "",
+            country=data.get("country_code") or data.get("country") or "",
+            state=data.get("region") or "",
+            lat=float(data["latitude"]),
+            lon=float(data["longitude"]),
+        )
+
+    async def get_weather(self, city: str) -> CurrentWeather:
+        """
+        Fetch weather data for a given city.
+
+        The name is geocoded once and the lookup goes by coordinates.
+        The result carries the geocoded city name and country, not the
+        nearest weather station's.
+
+        Args:
+            city: Name of the city
+
+        Returns:
+            Current weather
+
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        location = await self.resolve_city(city)
+        weather = await self.get_weather_by_coordinates(location.lat, location.lon)
+        return self._named(weather, location)
+
+    async def get_forecast(self, city: str) -> ForecastSeries:
+        """
+        Get 5-day weather forecast for a given city.
+
+        The name is geocoded once and the lookup goes by coordinates.
+        The result carries the geocoded city name and country.
+
+        Args:
+            city: Name of the city
+
+        Returns:
+            3-hourly forecast series
+
+        Raises:
+            WeatherServiceError: If the request fails
+        """
+        location = await self.resolve_city(city)
+        forecast = await self.get_forecast_by_coordinates(location.lat, location.lon)
+        return self._named(forecast, location)
+
+    @staticmethod
+    def _named(model, location: Location):
+        """
+        Copy of a coordinate lookup named after the resolved location.
+
+        A coordinate lookup names the nearest station or district, which
+        is often not the city the user asked for.
+        """
+        name = location.name or model.city_name
+        country = location.country or model.country
+        if (name, country) == (model.city_name, model.country):
+            return model
+        return dataclasses.replace(model, city_name=name, country=country)
+
+    @staticmethod
+    def _coord_params(lat: float, lon: float) -> Dict:
+        """Query parameters for a coordinate lookup, rounded like the cache key."""
+        return {
+            "lat": round(lat, 3),
+            "lon": round(lon, 3),
+            "units": Config.UNITS,
+        }
+
+    def _coord_request(
+        self,
+        endpoint: str,
+        lat: float,
+        lon: float,
+    ) -> Tuple[Hashable, float, Callable[[], Awaitable[Any]]]:
+        """
+        Build the cache key, TTL and fetch function for a coordinate lookup.
+
+        Args:
+            endpoint: "weather" or "forecast"
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Tuple of (cache key, TTL, fetch coroutine function)
+        """
+        params = self._coord_params(lat, lon)
+        params["appid"] = self.api_key
+
+        if endpoint == "weather":
+            model, url, ttl, label = (
+                CurrentWeather, self.base_url, Config.WEATHER_CACHE_TTL, "weather"
+            )
+        else:
+            model, url, ttl, label = (
+                ForecastSeries, self.forecast_url, Config.FORECAST_CACHE_TTL, "forecast"
+            )
+
+        async def fetch() -> Any:
+            value = await self._get_model(
+                model,
+                url,
+                params,
+                f"No {label} data found for ({lat}, {lon}).",
+                f"{label} data",
+            )
+            if endpoint == "weather" and self.observations is not None:
+                # File I/O; keep it off the event loop
+                await asyncio.to_thread(self._record_observation, value)
+            return value
+
+        return self._coord_key(endpoint, lat, lon), ttl, fetch
+
+    def _record_observation(self, weather: CurrentWeather):
+        """Append a fetched report to the history; best-effort."""
+        try:
+            self.observations.append(weather)
+        except (OSError, ValueError):
+            pass
+
     async def get_weather_by_coordinates(
-        self, 
-        lat: float, 
+        self,
+        lat: float,
         lon: float
-    ) -> Dict:
+    ) -> CurrentWeather:
         """
         Fetch weather data by coordinates.
-        
+
         Args:
             lat: Latitude
             lon: Longitude
-            
+
         Returns:
-            Dictionary containing weather data
+            Current weather
         """
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "units": Config.UNITS,
-        }
-        
+        return await self._cached(*self._coord_request("weather", lat, lon))
+
+    async def get_forecast_by_coordinates(
+        self,
+        lat: float,
+        lon: float
+    ) -> ForecastSeries:
+        """
+        Fetch 5-day forecast data by coordinates.
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            3-hourly forecast series
+        """
+        return await self._cached(*self._coord_request("forecast", lat, lon))
+
+    async def prefetch(self, city: str, lead_time: float = 0,
+                       forecast: bool = True) -> List[str]:
+        """
+        Refresh a city's cached weather and forecast ahead of expiry.
+
+        Args:
+            city: Name of the city
+            lead_time: Refresh entries that stop being fresh within this
+                many seconds
+            forecast: Also fetch the forecast when it is not cached; when
+                False, only a forecast that is already cached is kept warm
+
+        Returns:
+            Endpoints refreshed upstream ("weather", "forecast")
+
+        Raises:
+            WeatherServiceError: If a refresh fails
+        """
+        location = await self.resolve_city(city)
+        refreshed = []
+        for endpoint in ("weather", "forecast"):
+            key, ttl, fetch = self._coord_request(endpoint, location.lat, location.lon)
+            if key not in self.cache:
+                await self._load_from_store(key)
+
+            remaining = self.cache.expires_in(key)
+            if remaining is not None and remaining > lead_time:
+                continue
+            if remaining is None and endpoint == "forecast" and not forecast:
+                continue
+
+            await self._remember(key, await fetch(), ttl)
+            refreshed.append(endpoint)
+        return refreshed
+
+    async def _weather_for_query(self, query: Query) -> CurrentWeather:
+        """Fetch current weather for a city name or (lat, lon) pair."""
+        if isinstance(query, str):
+            return await self.get_weather(query)
+        lat, lon = query
+        return await self.get_weather_by_coordinates(lat, lon)
+
+    async def _forecast_for_query(self, query: Query) -> ForecastSeries:
+        """Fetch the forecast for a city name or (lat, lon) pair."""
+        if isinstance(query, str):
+            return await self.get_forecast(query)
+        lat, lon = query
+        return await self.get_forecast_by_coordinates(lat, lon)
+
+    def get_weather_many(
+        self,
+        queries: Union[Iterable[Query], AsyncIterable[Query]],
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Fetch current weather for many cities concurrently.
+
+        Args:
+            queries: City names and/or (lat, lon) pairs
+            concurrency: Maximum requests in flight
+                (defaults to ``Config.BATCH_CONCURRENCY``)
+
+        Returns:
+            Async iterator of BatchResult, yielded as each lookup completes
+        """
+        return self._run_batch(queries, self._weather_for_query, concurrency)
+
+    def get_forecast_many(
+        self,
+        queries: Union[Iterable[Query], AsyncIterable[Query]],
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Fetch forecasts for many cities concurrently.
+
+        Args:
+            queries: City names and/or (lat, lon) pairs
+            concurrency: Maximum requests in flight
+                (defaults to ``Config.BATCH_CONCURRENCY``)
+
+        Returns:
+            Async iterator of BatchResult, yielded as each lookup completes
+        """
+        return self._run_batch(queries, self._forecast_for_query, concurrency)
+
+    async def _run_batch(
+        self,
+        queries: Union[Iterable[Query], AsyncIterable[Query]],
+        fetch: Callable[[Query], Awaitable[Any]],
+        concurrency: Optional[int],
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Run lookups with bounded concurrency and yield results as they finish.
+
+        Queries are pulled lazily, so at most ``concurrency`` items are held
+        in memory regardless of how long the input is. A failing item is
+        reported in its BatchResult instead of aborting the batch.
+        """
+        limit = max(1, concurrency or Config.BATCH_CONCURRENCY)
+        if hasattr(queries, "__aiter__"):
+            source = queries.__aiter__()
+            is_async = True
+        else:
+            source = iter(queries)
+            is_async = False
+
+        async def run_one(index: int, query: Query) -> BatchResult:
+            started = time.perf_counter()
+            try:
+                data = await fetch(query)
+            except Exception as e:
+                return BatchResult(query, None, e, time.perf_counter() - started, index)
+            return BatchResult(query, data, None, time.perf_counter() - started, index)
+
+        pending = set()
+        pulled = 0
+        exhausted = False
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                return response.json()
-                
-        except Exception as e:
-            raise WeatherServiceError(f"Error fetching weather data: {str(e)}")
\ No newline at end of file
+            while True:
+                # Top up the window of in-flight lookups
+                while not exhausted and len(pending) < limit:
+                    try:
+                        if is_async:
+                            query = await source.__anext__()
+                        else:
+                            query = next(source)
+                    except (StopIteration, StopAsyncIteration):
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(run_one(pulled, query)))
+                    pulled += 1
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # The consumer stopped early or was cancelled; wait for the
+            # lookups to finish cancelling so none outlive the batch
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)